@@ -14,6 +14,7 @@ from api.websockets import (
 from api.routes import shipments, optimization, graph, analytics, agent
 from kitt_mcp.database import db
 from services.neo4j_service import get_neo4j_service
+from services.http_client import close_http_client
 
 # Configure logging
 logging.basicConfig(
@@ -79,6 +80,8 @@ async def startup_event():
 async def shutdown_event():
     """Application shutdown tasks"""
     logger.info("🛑 Shutting down KITT Freight Optimizer API")
+    await db.disconnect()
+    await close_http_client()
 
 
 @app.get("/")
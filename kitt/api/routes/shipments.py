@@ -29,7 +29,7 @@ class ShipmentCreate(BaseModel):
     destination: str = Field(..., min_length=1)
     items: List[ItemCreate] = Field(..., min_items=1)
     priority: str = Field(default="medium", pattern="^(low|medium|high|critical)$")
-    deadline: Optional[str] = None
+    deadline: Optional[datetime] = None
 
 
 @router.post("", status_code=201)
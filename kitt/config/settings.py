@@ -12,6 +12,8 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./kitt.db"
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_STATEMENT_CACHE_SIZE: int = 256
 
     # Redpanda
     REDPANDA_BOOTSTRAP_SERVERS: str = "localhost:9092"
@@ -23,6 +25,7 @@ class Settings(BaseSettings):
     # Weather API (OpenWeatherMap)
     WEATHER_API_KEY: str = ""
     WEATHER_API_URL: str = "https://api.openweathermap.org/data/2.5"
+    GEOCODING_CACHE_SIZE: int = 1024
 
     # Traffic API (TomTom)
     TRAFFIC_API_KEY: str = ""
@@ -1,6 +1,8 @@
 import aiosqlite
+import asyncio
 import json
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 import logging
@@ -9,25 +11,84 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Hot-path statements. Keeping the SQL text identical across calls lets
+# sqlite3's per-connection statement cache reuse the compiled statement.
+SQL_GET_SHIPMENT = "SELECT * FROM shipments WHERE id = ?"
+SQL_GET_SHIPMENT_ITEMS = "SELECT * FROM items WHERE shipment_id = ?"
+SQL_INSERT_ITEM = """
+    INSERT INTO items
+    (id, shipment_id, width, height, depth, weight, fragile, stackable, description)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 
 class Database:
     """Async SQLite database manager for KITT"""
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool_size: int = None):
         self.db_path = db_path or settings.DATABASE_URL.replace("sqlite:///", "")
-        self.connection: Optional[aiosqlite.Connection] = None
+        self.pool_size = pool_size or settings.DATABASE_POOL_SIZE
+        self._pool: Optional[asyncio.Queue] = None
+        self._connections: List[aiosqlite.Connection] = []
+        self._pool_lock = asyncio.Lock()
+
+    async def _open_connection(self) -> aiosqlite.Connection:
+        """Open a pooled connection with row access by column name"""
+        connection = await aiosqlite.connect(
+            self.db_path,
+            cached_statements=settings.DATABASE_STATEMENT_CACHE_SIZE
+        )
+        connection.row_factory = aiosqlite.Row
+        return connection
 
     async def connect(self):
-        """Connect to database"""
-        self.connection = await aiosqlite.connect(self.db_path)
-        self.connection.row_factory = aiosqlite.Row
-        logger.info(f"Connected to database: {self.db_path}")
+        """Open the connection pool"""
+        async with self._pool_lock:
+            if self._pool is not None:
+                return
+
+            pool: asyncio.Queue = asyncio.Queue()
+            try:
+                for _ in range(self.pool_size):
+                    connection = await self._open_connection()
+                    self._connections.append(connection)
+                    pool.put_nowait(connection)
+            except Exception:
+                for connection in self._connections:
+                    await connection.close()
+                self._connections = []
+                raise
+            self._pool = pool
+
+        logger.info(f"Connected to database: {self.db_path} (pool_size={self.pool_size})")
 
     async def disconnect(self):
-        """Disconnect from database"""
-        if self.connection:
-            await self.connection.close()
-            logger.info("Disconnected from database")
+        """Close all pooled connections"""
+        if self._pool is None:
+            return
+
+        for connection in self._connections:
+            await connection.close()
+        self._connections = []
+        self._pool = None
+        logger.info("Disconnected from database")
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection from the pool, opening the pool on first use"""
+        if self._pool is None:
+            await self.connect()
+
+        pool = self._pool
+        connection = await pool.get()
+        try:
+            yield connection
+        except Exception:
+            # Don't hand a connection with a half-finished transaction back
+            await connection.rollback()
+            raise
+        finally:
+            pool.put_nowait(connection)
 
     async def initialize_schema(self):
         """Initialize database schema from schema.sql"""
@@ -36,7 +97,7 @@ class Database:
         if not schema_path.exists():
             raise FileNotFoundError(f"Schema file not found: {schema_path}")
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire() as db:
             with open(schema_path, 'r') as f:
                 schema_sql = f.read()
             await db.executescript(schema_sql)
@@ -54,7 +115,7 @@ class Database:
         deadline: datetime = None
     ) -> str:
         """Create a new shipment"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire() as db:
             await db.execute("""
                 INSERT INTO shipments (id, origin, destination, priority, deadline)
                 VALUES (?, ?, ?, ?, ?)
@@ -66,18 +127,14 @@ class Database:
 
     async def get_shipment(self, shipment_id: str) -> Optional[Dict[str, Any]]:
         """Get shipment by ID"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM shipments WHERE id = ?",
-                (shipment_id,)
-            ) as cursor:
+        async with self.acquire() as db:
+            async with db.execute(SQL_GET_SHIPMENT, (shipment_id,)) as cursor:
                 row = await cursor.fetchone()
                 return dict(row) if row else None
 
     async def update_shipment_status(self, shipment_id: str, status: str) -> bool:
         """Update shipment status"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire() as db:
             await db.execute("""
                 UPDATE shipments
                 SET status = ?, updated_at = CURRENT_TIMESTAMP
@@ -94,9 +151,7 @@ class Database:
         limit: int = 100
     ) -> List[Dict[str, Any]]:
         """List shipments with optional status filter"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-
+        async with self.acquire() as db:
             if status:
                 query = "SELECT * FROM shipments WHERE status = ? ORDER BY created_at DESC LIMIT ?"
                 params = (status, limit)
@@ -122,25 +177,39 @@ class Database:
         description: str = None
     ) -> str:
         """Add item to shipment"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO items
-                (id, shipment_id, width, height, depth, weight, fragile, stackable, description)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (item_id, shipment_id, width, height, depth, weight, fragile, stackable, description))
+        async with self.acquire() as db:
+            await db.execute(
+                SQL_INSERT_ITEM,
+                (item_id, shipment_id, width, height, depth, weight, fragile, stackable, description)
+            )
             await db.commit()
 
         logger.info(f"Added item {item_id} to shipment {shipment_id}")
         return item_id
 
+    async def add_items(self, items: List[tuple]) -> int:
+        """
+        Add many items in one transaction
+
+        Args:
+            items: Row tuples in SQL_INSERT_ITEM column order
+                (id, shipment_id, width, height, depth, weight, fragile,
+                stackable, description)
+
+        Returns:
+            int: Number of items inserted
+        """
+        async with self.acquire() as db:
+            await db.executemany(SQL_INSERT_ITEM, items)
+            await db.commit()
+
+        logger.info(f"Added {len(items)} items")
+        return len(items)
+
     async def get_shipment_items(self, shipment_id: str) -> List[Dict[str, Any]]:
         """Get all items for a shipment"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM items WHERE shipment_id = ?",
-                (shipment_id,)
-            ) as cursor:
+        async with self.acquire() as db:
+            async with db.execute(SQL_GET_SHIPMENT_ITEMS, (shipment_id,)) as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
 
@@ -157,7 +226,7 @@ class Database:
         computation_time_ms: int = 0
     ) -> str:
         """Save packing plan"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire() as db:
             await db.execute("""
                 INSERT INTO packing_plans
                 (id, shipment_id, truck_id, plan_data, utilization, risk_score,
@@ -174,8 +243,7 @@ class Database:
 
     async def get_packing_plan(self, plan_id: str) -> Optional[Dict[str, Any]]:
         """Get packing plan by ID"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.acquire() as db:
             async with db.execute(
                 "SELECT * FROM packing_plans WHERE id = ?",
                 (plan_id,)
@@ -192,8 +260,7 @@ class Database:
         shipment_id: str
     ) -> List[Dict[str, Any]]:
         """Get all packing plans for a shipment"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.acquire() as db:
             async with db.execute(
                 "SELECT * FROM packing_plans WHERE shipment_id = ? ORDER BY created_at DESC",
                 (shipment_id,)
@@ -209,18 +276,42 @@ class Database:
     # Truck operations
     async def get_available_trucks(self) -> List[Dict[str, Any]]:
         """Get all available trucks"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.acquire() as db:
             async with db.execute(
                 "SELECT * FROM trucks WHERE status = 'available'"
             ) as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
 
+    async def pick_truck_for(
+        self,
+        volume: float,
+        weight: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Pick the available truck that best fits a load
+
+        Trucks that can carry the weight win; if none can, the one with the
+        highest max_weight is used and the overflow goes to extra bins. Then
+        trucks whose cargo volume holds the whole load win over smaller ones,
+        and within each group the closest volume match is returned.
+        """
+        async with self.acquire() as db:
+            async with db.execute("""
+                SELECT * FROM trucks
+                WHERE status = 'available'
+                ORDER BY max_weight < ?,
+                         CASE WHEN max_weight < ? THEN -max_weight END,
+                         width * height * depth < ?,
+                         abs(width * height * depth - ?)
+                LIMIT 1
+            """, (weight, weight, volume, volume)) as cursor:
+                row = await cursor.fetchone()
+                return dict(row) if row else None
+
     async def get_truck(self, truck_id: str) -> Optional[Dict[str, Any]]:
         """Get truck by ID"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.acquire() as db:
             async with db.execute(
                 "SELECT * FROM trucks WHERE id = ?",
                 (truck_id,)
@@ -230,7 +321,7 @@ class Database:
 
     async def update_truck_status(self, truck_id: str, status: str) -> bool:
         """Update truck status"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire() as db:
             await db.execute("""
                 UPDATE trucks
                 SET status = ?, updated_at = CURRENT_TIMESTAMP
@@ -259,7 +350,7 @@ class Database:
         import uuid
         analytics_id = str(uuid.uuid4())
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire() as db:
             await db.execute("""
                 INSERT INTO route_analytics
                 (id, route_id, origin, destination, distance_km, duration_minutes,
@@ -282,8 +373,7 @@ class Database:
         limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Get recent route analytics"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.acquire() as db:
             async with db.execute("""
                 SELECT * FROM route_analytics
                 WHERE route_id = ?
@@ -306,7 +396,7 @@ class Database:
         import uuid
         prediction_id = str(uuid.uuid4())
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire() as db:
             await db.execute("""
                 INSERT INTO ai_predictions
                 (id, shipment_id, prediction_type, model_version, prediction_data, confidence)
@@ -325,8 +415,7 @@ class Database:
         shipment_id: str
     ) -> List[Dict[str, Any]]:
         """Get all AI predictions for a shipment"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self.acquire() as db:
             async with db.execute("""
                 SELECT * FROM ai_predictions
                 WHERE shipment_id = ?
@@ -354,7 +443,7 @@ class Database:
         import uuid
         incident_id = str(uuid.uuid4())
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire() as db:
             await db.execute("""
                 INSERT INTO damage_incidents
                 (id, shipment_id, route_id, incident_type, severity,
@@ -371,9 +460,7 @@ class Database:
 
     async def get_all_shipments(self, limit: int = 100, status: str = None, priority: str = None) -> List[Dict[str, Any]]:
         """Get all shipments with optional filters"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-
+        async with self.acquire() as db:
             query = "SELECT * FROM shipments"
             params = []
             conditions = []
@@ -398,9 +485,7 @@ class Database:
 
     async def get_all_packing_plans(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get all packing plans"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-
+        async with self.acquire() as db:
             async with db.execute("""
                 SELECT * FROM packing_plans
                 ORDER BY created_at DESC
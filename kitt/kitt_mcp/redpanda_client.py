@@ -9,6 +9,17 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+try:
+    import msgspec
+    # C-level encoder reused for every message; unknown types fall back to str
+    _json_encoder = msgspec.json.Encoder(enc_hook=str)
+    _encode_json = _json_encoder.encode
+except ImportError:
+    msgspec = None
+
+    def _encode_json(value: Any) -> bytes:
+        return json.dumps(value, default=str).encode('utf-8')
+
 
 class RedpandaClient:
     """Redpanda (Kafka-compatible) client for event streaming"""
@@ -34,7 +45,7 @@ class RedpandaClient:
         try:
             producer = KafkaProducer(
                 bootstrap_servers=self.bootstrap_servers,
-                value_serializer=lambda v: json.dumps(v, default=str).encode('utf-8'),
+                value_serializer=_encode_json,
                 key_serializer=lambda k: k.encode('utf-8') if k else None,
                 acks='all',
                 retries=3,
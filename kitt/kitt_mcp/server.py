@@ -1,6 +1,7 @@
 import asyncio
 import logging
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Literal
 from contextlib import asynccontextmanager
 
 try:
@@ -13,6 +14,7 @@ from kitt_mcp.database import db
 from kitt_mcp.tools import tools
 from kitt_mcp.graph_tools import graph_tools
 from services.neo4j_service import get_neo4j_service
+from services.http_client import close_http_client
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -43,6 +45,7 @@ async def lifespan(mcp_app):
     # Cleanup on shutdown
     logger.info("🛑 Shutting down KITT MCP Server")
     await db.disconnect()
+    await close_http_client()
 
     # Close Neo4j connection
     try:
@@ -82,7 +85,7 @@ if mcp:
         destination: str,
         items: list,
         priority: str = "medium",
-        deadline: Optional[str] = None
+        deadline: Optional[datetime] = None
     ) -> dict:
         """
         Create a new shipment with items
@@ -92,7 +95,7 @@ if mcp:
             destination: Destination location
             items: List of items with dimensions (width, height, depth, weight)
             priority: Shipment priority (low/medium/high/critical)
-            deadline: Optional deadline in ISO format
+            deadline: Optional deadline as an ISO 8601 datetime
 
         Returns:
             Created shipment information
@@ -180,7 +183,18 @@ if mcp:
         return await tools.predict_damage_risk(shipment_id, route_id)
 
     @mcp.tool()
-    async def publish_event(event_type: str, event_data: dict) -> dict:
+    async def publish_event(
+        event_type: Literal[
+            "shipment_request",
+            "packing_result",
+            "route_update",
+            "weather_alert",
+            "traffic_update",
+            "damage_prediction",
+            "notification"
+        ],
+        event_data: dict
+    ) -> dict:
         """
         Publish event to Redpanda event stream
 
@@ -1,7 +1,8 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Final
 import logging
+import os
+import time
 from datetime import datetime
-from uuid import uuid4
 
 from kitt_mcp.database import db
 from kitt_mcp.redpanda_client import redpanda
@@ -13,6 +14,36 @@ from services.geocoding_service import get_geocoding_service
 
 logger = logging.getLogger(__name__)
 
+# Event type -> Redpanda topic, built once at import
+_TOPIC_MAP: Final[Dict[str, str]] = {
+    "shipment_request": redpanda.TOPICS["SHIPMENT_REQUESTS"],
+    "packing_result": redpanda.TOPICS["PACKING_RESULTS"],
+    "route_update": redpanda.TOPICS["ROUTE_UPDATES"],
+    "weather_alert": redpanda.TOPICS["WEATHER_ALERTS"],
+    "traffic_update": redpanda.TOPICS["TRAFFIC_UPDATES"],
+    "damage_prediction": redpanda.TOPICS["DAMAGE_PREDICTIONS"],
+    "notification": redpanda.TOPICS["NOTIFICATIONS"]
+}
+
+# Crockford base32 alphabet used by ULIDs
+_ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def _new_id(prefix: str) -> str:
+    """
+    Generate a prefixed ULID (e.g. SH-01J9Z3...)
+
+    48 bits of millisecond timestamp followed by 80 random bits, so IDs
+    sort by creation time and don't cluster index inserts the way random
+    UUID prefixes do.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    chars = []
+    for _ in range(26):
+        chars.append(_ULID_ALPHABET[value & 0x1F])
+        value >>= 5
+    return f"{prefix}-{''.join(reversed(chars))}"
+
 
 class MCPTools:
     """MCP Tools for KITT freight optimization"""
@@ -59,7 +90,7 @@ class MCPTools:
         destination: str,
         items: List[dict],
         priority: str = "medium",
-        deadline: str = None
+        deadline: Optional[datetime] = None
     ) -> Dict[str, Any]:
         """
         Create new shipment with items
@@ -69,13 +100,13 @@ class MCPTools:
             destination: Destination location
             items: List of items (each with width, height, depth, weight)
             priority: Shipment priority (low/medium/high/critical)
-            deadline: Deadline timestamp (ISO format)
+            deadline: Deadline timestamp (parsed by the API/MCP schema)
 
         Returns:
             dict: Created shipment data
         """
         try:
-            shipment_id = f"SH-{str(uuid4())[:8].upper()}"
+            shipment_id = _new_id("SH")
 
             # Create shipment
             await self.db.create_shipment(
@@ -83,23 +114,25 @@ class MCPTools:
                 origin=origin,
                 destination=destination,
                 priority=priority,
-                deadline=datetime.fromisoformat(deadline) if deadline else None
+                deadline=deadline
             )
 
-            # Add items
-            for idx, item_data in enumerate(items):
-                item_id = f"{shipment_id}-ITEM-{idx:03d}"
-                await self.db.add_item(
-                    item_id=item_id,
-                    shipment_id=shipment_id,
-                    width=item_data["width"],
-                    height=item_data["height"],
-                    depth=item_data["depth"],
-                    weight=item_data["weight"],
-                    fragile=item_data.get("fragile", False),
-                    stackable=item_data.get("stackable", True),
-                    description=item_data.get("description")
+            # Add items in a single batched insert
+            item_ids = [f"{shipment_id}-ITEM-{idx:03d}" for idx in range(len(items))]
+            await self.db.add_items([
+                (
+                    item_id,
+                    shipment_id,
+                    item_data["width"],
+                    item_data["height"],
+                    item_data["depth"],
+                    item_data["weight"],
+                    item_data.get("fragile", False),
+                    item_data.get("stackable", True),
+                    item_data.get("description")
                 )
+                for item_id, item_data in zip(item_ids, items)
+            ])
 
             # Publish event to Redpanda
             self.redpanda.publish_shipment_request({
@@ -115,7 +148,8 @@ class MCPTools:
             return {
                 "success": True,
                 "shipment_id": shipment_id,
-                "items_added": len(items)
+                "items_added": len(items),
+                "item_ids": item_ids
             }
 
         except Exception as e:
@@ -151,10 +185,11 @@ class MCPTools:
 
             # Get truck (auto-select if not provided)
             if not truck_id:
-                available_trucks = await self.db.get_available_trucks()
-                if not available_trucks:
+                total_volume = sum(i["width"] * i["height"] * i["depth"] for i in items)
+                total_weight = sum(i["weight"] for i in items)
+                truck = await self.db.pick_truck_for(total_volume, total_weight)
+                if not truck:
                     return {"error": "No available trucks"}
-                truck = available_trucks[0]  # Simple selection, can be improved
                 truck_id = truck["id"]
             else:
                 truck = await self.db.get_truck(truck_id)
@@ -194,7 +229,7 @@ class MCPTools:
             computation_time_ms = packing_result["computation_time_ms"]
 
             # Save packing plan
-            plan_id = f"PLAN-{str(uuid4())[:8].upper()}"
+            plan_id = _new_id("PLAN")
             await self.db.save_packing_plan(
                 plan_id=plan_id,
                 shipment_id=shipment_id,
@@ -375,6 +410,11 @@ class MCPTools:
                 packing_data=packing_data
             )
 
+            # Don't persist or publish a failed analysis
+            if isinstance(prediction, dict) and "error" in prediction:
+                logger.warning(f"Damage risk analysis failed for {shipment_id}: {prediction['error']}")
+                return prediction
+
             # Save prediction
             await self.db.save_ai_prediction(
                 shipment_id=shipment_id,
@@ -417,18 +457,7 @@ class MCPTools:
             dict: Success status
         """
         try:
-            # Map event type to topic
-            topic_map = {
-                "shipment_request": redpanda.TOPICS["SHIPMENT_REQUESTS"],
-                "packing_result": redpanda.TOPICS["PACKING_RESULTS"],
-                "route_update": redpanda.TOPICS["ROUTE_UPDATES"],
-                "weather_alert": redpanda.TOPICS["WEATHER_ALERTS"],
-                "traffic_update": redpanda.TOPICS["TRAFFIC_UPDATES"],
-                "damage_prediction": redpanda.TOPICS["DAMAGE_PREDICTIONS"],
-                "notification": redpanda.TOPICS["NOTIFICATIONS"]
-            }
-
-            topic = topic_map.get(event_type)
+            topic = _TOPIC_MAP.get(event_type)
             if not topic:
                 return {"error": f"Unknown event type: {event_type}"}
 
@@ -469,6 +498,10 @@ class MCPTools:
             # Use Claude to analyze
             analysis = await self.claude.analyze_shipment(shipment, items)
 
+            if isinstance(analysis, dict) and "error" in analysis:
+                logger.warning(f"AI analysis failed for {shipment_id}: {analysis['error']}")
+                return analysis
+
             # Save as AI prediction
             await self.db.save_ai_prediction(
                 shipment_id=shipment_id,
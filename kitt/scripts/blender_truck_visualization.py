@@ -8,6 +8,9 @@ Usage:
         --packing-data /tmp/truck_loading_plan.json \
         --output /tmp/truck_rendered.png
 
+    Add --quality high to path trace with Cycles instead of EEVEE, or
+    --preview to render at half resolution with fewer samples.
+
 Or run inside Blender:
     1. Open Blender
     2. Go to Scripting tab
@@ -17,17 +20,261 @@ Or run inside Blender:
 """
 
 import bpy
-import json
+import bmesh
+import hashlib
+import os
 import sys
 import math
+import tempfile
 from pathlib import Path
 from mathutils import Vector, Euler
 
+# Blender doesn't put the script directory on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from plan_io import load_plan
+
+
+UNIT_CUBE_NAME = "UnitCube"
+BEVELLED_CUBE_NAME = "UnitCubeBevelled"
+BOX_MATERIAL_NAME = "BoxMaterial"
+CONTAINER_MATERIAL_NAME = "ContainerMaterial"
+LABEL_MATERIAL_NAME = "LabelMaterial"
+
+# Fixed camera and sun orientations
+CAMERA_ROTATION = Euler((math.radians(60), 0, math.radians(45)), 'XYZ')
+SUN_ROTATION = Euler((math.radians(45), 0, math.radians(45)), 'XYZ')
+
+# Bevel baked into the shared box mesh, as a fraction of each box dimension
+BOX_BEVEL = 0.02
+
+# Loaded images keyed on (resolved path, mtime, size)
+_IMAGE_CACHE = {}
+
+# 1×1×1 cube centred on the origin; objects scale it to their dimensions
+_UNIT_CUBE_VERTS = [
+    (-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, 0.5, -0.5), (-0.5, 0.5, -0.5),
+    (-0.5, -0.5, 0.5), (0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (-0.5, 0.5, 0.5),
+]
+_UNIT_CUBE_FACES = [
+    (0, 3, 2, 1), (4, 5, 6, 7), (0, 1, 5, 4),
+    (1, 2, 6, 5), (2, 3, 7, 6), (3, 0, 4, 7),
+]
+
+
+def get_unit_cube():
+    """
+    Get the shared unit cube mesh, building it on first use
+
+    Objects link shared mesh datablocks instead of each creating a mesh
+    through bpy.ops, which would trigger a full depsgraph update per call.
+    """
+    mesh = bpy.data.meshes.get(UNIT_CUBE_NAME)
+    if mesh is None:
+        mesh = bpy.data.meshes.new(UNIT_CUBE_NAME)
+        mesh.from_pydata(_UNIT_CUBE_VERTS, [], _UNIT_CUBE_FACES)
+        mesh.update()
+        # Single slot; each object links its own material to it
+        mesh.materials.append(None)
+    return mesh
+
+
+def get_bevelled_cube():
+    """
+    Get the shared bevelled unit cube used by every cargo box
+
+    The bevel is baked into this one mesh rather than added as a per-box
+    modifier, so all boxes stay instances of a single datablock and the
+    renderer builds its geometry once regardless of item count. The box
+    material lives on the mesh; per-box colour comes from obj.color.
+    """
+    mesh = bpy.data.meshes.get(BEVELLED_CUBE_NAME)
+    if mesh is None:
+        mesh = bpy.data.meshes.new(BEVELLED_CUBE_NAME)
+
+        bm = bmesh.new()
+        for vert in _UNIT_CUBE_VERTS:
+            bm.verts.new(vert)
+        bm.verts.ensure_lookup_table()
+        for face in _UNIT_CUBE_FACES:
+            bm.faces.new([bm.verts[i] for i in face])
+
+        # Edge highlighting
+        bmesh.ops.bevel(
+            bm,
+            geom=list(bm.edges),
+            offset=BOX_BEVEL,
+            segments=2,
+            profile=0.5,
+            affect='EDGES'
+        )
+        bm.to_mesh(mesh)
+        bm.free()
+
+        mesh.materials.append(get_box_material())
+    return mesh
+
+
+def add_cube_object(name, location, size, material=None, mesh=None):
+    """
+    Link a new object using a shared cube mesh into the scene
+
+    Args:
+        name: Object name
+        location: Centre (x, y, z) in Blender coordinates
+        size: Full (x, y, z) extent
+        material: Material bound to this object only (None keeps the
+                  mesh's own material)
+        mesh: Shared mesh to instance (defaults to the plain unit cube)
+
+    Returns:
+        cube object
+    """
+    obj = bpy.data.objects.new(name, mesh or get_unit_cube())
+    obj.location = location
+    obj.scale = size
+    bpy.context.scene.collection.objects.link(obj)
+
+    if material is not None:
+        # Bind per object so the shared mesh isn't recoloured
+        obj.material_slots[0].link = 'OBJECT'
+        obj.material_slots[0].material = material
+
+    return obj
+
+
+def get_box_material():
+    """
+    Get the material shared by all cargo boxes, building it on first use
+
+    Base and emission colour come from the Object Info node, so each box
+    only sets obj.color and one shader graph is compiled for every box.
+    """
+    mat = bpy.data.materials.get(BOX_MATERIAL_NAME)
+    if mat is not None:
+        return mat
+
+    mat = bpy.data.materials.new(name=BOX_MATERIAL_NAME)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    nodes.clear()
+
+    # Create shader nodes
+    output = nodes.new('ShaderNodeOutputMaterial')
+    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
+    object_info = nodes.new('ShaderNodeObjectInfo')
+
+    # Per-object colour drives base colour and emission
+    mat.node_tree.links.new(object_info.outputs['Color'], bsdf.inputs[0])  # Base Color
+    mat.node_tree.links.new(object_info.outputs['Color'], bsdf.inputs[18])  # Emission
+
+    # Shared properties
+    bsdf.inputs[4].default_value = 0.5  # Metallic
+    bsdf.inputs[7].default_value = 0.2  # Roughness
+    bsdf.inputs[12].default_value = 0.0  # Clearcoat
+    bsdf.inputs[19].default_value = 0.2  # Emission Strength
+
+    # Connect nodes
+    mat.node_tree.links.new(bsdf.outputs[0], output.inputs[0])
+
+    return mat
+
+
+def load_image_cached(image_path):
+    """
+    Load an image datablock, reusing it while the file is unchanged
+
+    Repeat renders of the same truck photo skip decoding it again.
+    """
+    st = os.stat(image_path)
+    resolved = str(Path(image_path).resolve())
+    key = (resolved, st.st_mtime_ns, st.st_size)
+
+    img = _IMAGE_CACHE.get(key)
+    if img is not None:
+        try:
+            img.name  # Raises if the datablock was removed since
+            return img
+        except ReferenceError:
+            del _IMAGE_CACHE[key]
+
+    # Drop entries for an older version of the same file
+    stale = [k for k in _IMAGE_CACHE if k[0] == resolved]
+    for k in stale:
+        del _IMAGE_CACHE[k]
+
+    img = bpy.data.images.load(image_path, check_existing=True)
+    if stale:
+        img.reload()
+
+    _IMAGE_CACHE[key] = img
+    return img
+
+
+def background_thumbnail(image_path, max_width, max_height):
+    """
+    Downscale a truck photo to the render size for use as the camera background
+
+    The background is only shown behind the boxes, so a 4K photo would just
+    cost memory. Thumbnails are kept in the temp directory and rebuilt when
+    the source changes. Returns the original path if PIL isn't available in
+    Blender's Python or the photo is already small enough.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return image_path
+
+    src = Path(image_path).resolve()
+    digest = hashlib.md5(str(src).encode()).hexdigest()[:8]
+    thumb = Path(tempfile.gettempdir()) / f"{src.stem}_{digest}_bg_{max_width}x{max_height}.png"
+
+    if thumb.exists() and thumb.stat().st_mtime_ns >= src.stat().st_mtime_ns:
+        return str(thumb)
+
+    with Image.open(src) as im:
+        if im.width <= max_width and im.height <= max_height:
+            return image_path
+        im.draft('RGB', (max_width, max_height))  # JPEG: decode at reduced scale
+        im.thumbnail((max_width, max_height), Image.LANCZOS)
+        im.save(thumb)
+
+    return str(thumb)
+
+
+def get_emission_material(name, color, strength):
+    """Get a named emission-only material, building it on first use"""
+    mat = bpy.data.materials.get(name)
+    if mat is not None:
+        return mat
+
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    nodes.clear()
+
+    output = nodes.new('ShaderNodeOutputMaterial')
+    emission = nodes.new('ShaderNodeEmission')
+    emission.inputs[0].default_value = color
+    emission.inputs[1].default_value = strength
+
+    mat.node_tree.links.new(emission.outputs[0], output.inputs[0])
+    return mat
+
 
 def clear_scene():
-    """Remove all objects from scene"""
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete(use_global=False)
+    """
+    Remove all objects and the data they used
+
+    Goes through bpy.data rather than the select/delete operators, which
+    need a UI context and update the depsgraph on every call. Shared meshes
+    and materials are rebuilt on demand by their get_* helpers.
+    """
+    for collection in (
+        bpy.data.objects, bpy.data.meshes, bpy.data.curves, bpy.data.materials,
+        bpy.data.lights, bpy.data.cameras, bpy.data.images,
+    ):
+        for block in list(collection):
+            collection.remove(block, do_unlink=True)
 
 
 def setup_camera(truck_image_path, image_width=1920, image_height=1080):
@@ -55,7 +302,7 @@ def setup_camera(truck_image_path, image_width=1920, image_height=1080):
     camera.data.sensor_width = 36
 
     # Point camera at container center
-    camera.rotation_euler = Euler((math.radians(60), 0, math.radians(45)), 'XYZ')
+    camera.rotation_euler = CAMERA_ROTATION
 
     # Setup render settings
     scene = bpy.context.scene
@@ -65,8 +312,8 @@ def setup_camera(truck_image_path, image_width=1920, image_height=1080):
 
     # Load truck image as background
     if truck_image_path and Path(truck_image_path).exists():
-        # Load image
-        img = bpy.data.images.load(truck_image_path)
+        # Load a render-sized copy (cached across renders of the same file)
+        img = load_image_cached(background_thumbnail(truck_image_path, image_width, image_height))
 
         # Set as camera background
         camera.data.show_background_images = True
@@ -83,7 +330,7 @@ def setup_camera(truck_image_path, image_width=1920, image_height=1080):
 
 def create_container_outline(width, height, depth):
     """
-    Create wireframe outline of container
+    Create wireframe outline of container, or resize the existing one
 
     Args:
         width, height, depth: Container dimensions in cm
@@ -91,36 +338,46 @@ def create_container_outline(width, height, depth):
     Returns:
         container object
     """
-    # Create cube
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(width/2, depth/2, height/2))
-    container = bpy.context.active_object
-    container.name = "Container"
+    container = bpy.data.objects.get("Container")
+    if container is None:
+        # Gray emission shader for visibility
+        mat = get_emission_material(CONTAINER_MATERIAL_NAME, (0.5, 0.5, 0.5, 1.0), 1.0)
 
-    # Scale to container size
-    container.scale = (width/2, depth/2, height/2)
+        container = add_cube_object("Container", (0, 0, 0), (1, 1, 1), mat)
 
-    # Make it wireframe
-    bpy.ops.object.modifier_add(type='WIREFRAME')
-    container.modifiers["Wireframe"].thickness = 0.5
+        # Make it wireframe
+        container.modifiers.new("Wireframe", 'WIREFRAME')
 
-    # Material
-    mat = bpy.data.materials.new(name="ContainerMaterial")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
+    container.location = (width/2, depth/2, height/2)
+    container.scale = (width, depth, height)
 
-    # Add emission shader for visibility
-    output = nodes.new('ShaderNodeOutputMaterial')
-    emission = nodes.new('ShaderNodeEmission')
-    emission.inputs[0].default_value = (0.5, 0.5, 0.5, 1.0)  # Gray
-    emission.inputs[1].default_value = 1.0  # Strength
-
-    mat.node_tree.links.new(emission.outputs[0], output.inputs[0])
-    container.data.materials.append(mat)
+    # Thickness is in local units, ~0.5 cm in world
+    container.modifiers["Wireframe"].thickness = 0.5 / min(width, depth, height)
 
     return container
 
 
+def place_box(box, position, dimensions, color):
+    """
+    Move, resize and recolour a box object in place
+
+    Args:
+        box: Box object created by create_box
+        position: Dict with x, y, z
+        dimensions: Dict with width, height, depth
+        color: RGB tuple (0-1 range)
+    """
+    box.location = (
+        position['x'] + dimensions['width']/2,
+        position['z'] + dimensions['depth']/2,  # Z becomes Y in Blender
+        position['y'] + dimensions['height']/2   # Y becomes Z in Blender
+    )
+    box.scale = (dimensions['width'], dimensions['depth'], dimensions['height'])
+
+    # Colour is read by the shared material's Object Info node
+    box.color = (*color, 1.0)
+
+
 def create_box(item_id, position, dimensions, color):
     """
     Create a 3D box for cargo item
@@ -134,56 +391,46 @@ def create_box(item_id, position, dimensions, color):
     Returns:
         box object
     """
-    # Create cube
-    bpy.ops.mesh.primitive_cube_add(
-        size=1,
-        location=(
-            position['x'] + dimensions['width']/2,
-            position['z'] + dimensions['depth']/2,  # Z becomes Y in Blender
-            position['y'] + dimensions['height']/2   # Y becomes Z in Blender
-        )
-    )
+    box = add_cube_object(item_id, (0, 0, 0), (1, 1, 1), mesh=get_bevelled_cube())
 
-    box = bpy.context.active_object
-    box.name = item_id
+    place_box(box, position, dimensions, color)
 
-    # Scale to box dimensions
-    box.scale = (
-        dimensions['width']/2,
-        dimensions['depth']/2,
-        dimensions['height']/2
-    )
+    return box
 
-    # Create material with color
-    mat = bpy.data.materials.new(name=f"Material_{item_id}")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
 
-    # Create shader nodes
-    output = nodes.new('ShaderNodeOutputMaterial')
-    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
-
-    # Set color and properties
-    bsdf.inputs[0].default_value = (*color, 1.0)  # Base Color
-    bsdf.inputs[4].default_value = 0.5  # Metallic
-    bsdf.inputs[7].default_value = 0.2  # Roughness
-    bsdf.inputs[12].default_value = 0.0  # Clearcoat
-    bsdf.inputs[18].default_value = (*color, 1.0)  # Emission
-    bsdf.inputs[19].default_value = 0.2  # Emission Strength
+def update_boxes(items, colors):
+    """
+    Place one box per item, reusing box objects left by a previous render
 
-    # Connect nodes
-    mat.node_tree.links.new(bsdf.outputs[0], output.inputs[0])
+    Only transforms and colours change between plans, so the renderer can
+    keep its scene data (use_persistent_data) instead of rebuilding it.
+    Spare boxes from a larger earlier plan are hidden, not deleted.
 
-    # Assign material
-    box.data.materials.append(mat)
+    Args:
+        items: List of packing items
+        colors: RGB palette cycled across items
+    """
+    pool = sorted(
+        (obj for obj in bpy.data.objects if "kitt_box" in obj),
+        key=lambda obj: obj["kitt_box"]
+    )
 
-    # Add edge highlighting
-    bpy.ops.object.modifier_add(type='BEVEL')
-    box.modifiers["Bevel"].width = 0.5
-    box.modifiers["Bevel"].segments = 2
+    for i, item in enumerate(items):
+        color = colors[i % len(colors)]
+        if i < len(pool):
+            box = pool[i]
+            box.name = item['item_id']
+            place_box(box, item['position'], item['dimensions'], color)
+            box.hide_render = False
+            box.hide_viewport = False
+        else:
+            box = create_box(item['item_id'], item['position'], item['dimensions'], color)
+            box["kitt_box"] = i
+        print(f"  ✓ {item['item_id']}")
 
-    return box
+    for box in pool[len(items):]:
+        box.hide_render = True
+        box.hide_viewport = True
 
 
 def setup_lighting():
@@ -192,7 +439,7 @@ def setup_lighting():
     bpy.ops.object.light_add(type='SUN', location=(0, 0, 1000))
     sun = bpy.context.active_object
     sun.data.energy = 2.0
-    sun.rotation_euler = Euler((math.radians(45), 0, math.radians(45)), 'XYZ')
+    sun.rotation_euler = SUN_ROTATION
 
     # Area light (fill light)
     bpy.ops.object.light_add(type='AREA', location=(-500, -500, 500))
@@ -207,23 +454,73 @@ def setup_lighting():
     rim.data.size = 150
 
 
-def setup_render_settings(output_path):
+def configure_cycles_gpu(scene):
+    """
+    Point Cycles at the first available GPU backend, falling back to CPU
+
+    Returns:
+        Compute device type in use ('OPTIX', 'CUDA', ...) or None for CPU
+    """
+    prefs = bpy.context.preferences.addons['cycles'].preferences
+
+    for device_type in ('OPTIX', 'CUDA', 'HIP', 'METAL', 'ONEAPI'):
+        try:
+            prefs.compute_device_type = device_type
+        except TypeError:
+            # Backend not supported by this Blender build
+            continue
+
+        prefs.get_devices()
+        gpus = [d for d in prefs.devices if d.type == device_type]
+        if gpus:
+            for device in gpus:
+                device.use = True
+            scene.cycles.device = 'GPU'
+            return device_type
+
+    prefs.compute_device_type = 'NONE'
+    scene.cycles.device = 'CPU'
+    return None
+
+
+def setup_render_settings(output_path, quality="fast", preview=False):
     """
-    Configure render settings for high quality output
+    Configure render settings
 
     Args:
         output_path: Where to save rendered image
+        quality: "fast" rasterizes with EEVEE (flat-shaded boxes don't need
+                 path tracing); "high" uses Cycles with adaptive sampling
+        preview: Render at 50% resolution with 16 samples for quick iteration
     """
     scene = bpy.context.scene
 
-    # Use Cycles for photorealistic rendering
-    scene.render.engine = 'CYCLES'
-    scene.cycles.samples = 128  # Increase for better quality (slower)
-    scene.cycles.use_denoising = True
-
-    # Or use EEVEE for faster rendering
-    # scene.render.engine = 'BLENDER_EEVEE'
-    # scene.eevee.taa_render_samples = 64
+    # Render time scales with pixel count; preview keeps W/H but renders a quarter of the pixels
+    scene.render.resolution_percentage = 50 if preview else 100
+
+    if quality == "high":
+        # Cycles for photorealistic rendering
+        scene.render.engine = 'CYCLES'
+        device_type = configure_cycles_gpu(scene)
+        scene.cycles.samples = 16 if preview else 64
+        scene.cycles.use_adaptive_sampling = True
+        scene.cycles.adaptive_threshold = 0.01
+        scene.cycles.use_denoising = True
+        scene.cycles.denoiser = 'OPTIX' if device_type == 'OPTIX' else 'OPENIMAGEDENOISE'
+        print(f"Render engine: Cycles ({device_type or 'CPU'})")
+    else:
+        # EEVEE was renamed EEVEE Next in Blender 4.2
+        engines = {e.identifier for e in bpy.types.RenderSettings.bl_rna.properties['engine'].enum_items}
+        scene.render.engine = 'BLENDER_EEVEE_NEXT' if 'BLENDER_EEVEE_NEXT' in engines else 'BLENDER_EEVEE'
+        scene.eevee.taa_render_samples = 8 if preview else 16
+        if hasattr(scene.eevee, 'use_gtao'):
+            scene.eevee.use_gtao = True  # Ambient occlusion for box contact shadows
+        print("Render engine: EEVEE")
+
+    # Keep scene data between renders in one session; only transforms change
+    scene.render.use_persistent_data = True
+    if hasattr(scene.cycles, 'tile_size'):
+        scene.cycles.tile_size = 256
 
     # Output settings
     scene.render.filepath = output_path
@@ -236,6 +533,41 @@ def setup_render_settings(output_path):
     scene.render.image_settings.compression = 15
 
 
+def build_scene_once(truck_image_path, image_width=1920, image_height=1080):
+    """
+    Build camera and lighting, unless the scene already has them for this
+    truck image (e.g. from an earlier plan in the same Blender session)
+
+    Returns:
+        camera object
+    """
+    scene = bpy.context.scene
+    truck_key = truck_image_path or ""
+
+    if scene.camera is not None and scene.get("kitt_truck_image") == truck_key:
+        scene.render.resolution_x = image_width
+        scene.render.resolution_y = image_height
+        return scene.camera
+
+    # Clear scene
+    clear_scene()
+
+    # Setup camera
+    camera = setup_camera(truck_image_path, image_width, image_height)
+
+    # Setup lighting
+    setup_lighting()
+
+    scene["kitt_truck_image"] = truck_key
+    return camera
+
+
+def clear_labels():
+    """Remove text labels from a previous render"""
+    for obj in [obj for obj in bpy.data.objects if "kitt_label" in obj]:
+        bpy.data.objects.remove(obj, do_unlink=True)
+
+
 def add_text_labels(items):
     """
     Add text labels for each item
@@ -243,6 +575,8 @@ def add_text_labels(items):
     Args:
         items: List of packing items
     """
+    label_material = get_emission_material(LABEL_MATERIAL_NAME, (1, 1, 1, 1), 2.0)
+
     for item in items:
         pos = item['position']
         dims = item['dimensions']
@@ -257,18 +591,13 @@ def add_text_labels(items):
         )
 
         text = bpy.context.active_object
+        text["kitt_label"] = True
         text.data.body = item['item_id']
         text.data.size = 15
         text.data.align_x = 'CENTER'
 
-        # Text material
-        mat = bpy.data.materials.new(name=f"TextMat_{item['item_id']}")
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        emission = nodes.get('Emission') or nodes.new('ShaderNodeEmission')
-        emission.inputs[0].default_value = (1, 1, 1, 1)  # White
-        emission.inputs[1].default_value = 2.0
-        text.data.materials.append(mat)
+        # White emission text, one material shared by all labels
+        text.data.materials.append(label_material)
 
 
 def create_visualization(
@@ -277,7 +606,9 @@ def create_visualization(
     output_path,
     image_width=1920,
     image_height=1080,
-    add_labels=True
+    add_labels=True,
+    quality="fast",
+    preview=False
 ):
     """
     Main function to create Blender visualization
@@ -289,14 +620,15 @@ def create_visualization(
         image_width: Output width
         image_height: Output height
         add_labels: Whether to add text labels
+        quality: "fast" (EEVEE) or "high" (Cycles)
+        preview: Half-resolution, low-sample render for quick checks
     """
     print("=" * 70)
     print(" BLENDER TRUCK LOADING VISUALIZATION")
     print("=" * 70)
 
     # Load packing data
-    with open(packing_data_path) as f:
-        data = json.load(f)
+    data = load_plan(packing_data_path)
 
     container = data['container']['dimensions']
     items = data['items']
@@ -304,11 +636,8 @@ def create_visualization(
     print(f"\nContainer: {container['width']}×{container['height']}×{container['depth']} cm")
     print(f"Items: {len(items)}")
 
-    # Clear scene
-    clear_scene()
-
-    # Setup camera
-    camera = setup_camera(truck_image_path, image_width, image_height)
+    # Camera and lights persist across plans rendered in one session
+    camera = build_scene_once(truck_image_path, image_width, image_height)
 
     # Create container outline
     create_container_outline(
@@ -317,9 +646,6 @@ def create_visualization(
         container['depth']
     )
 
-    # Setup lighting
-    setup_lighting()
-
     # Color palette (convert to 0-1 range)
     colors = [
         (1.0, 0.2, 0.2),   # Red
@@ -333,28 +659,22 @@ def create_visualization(
     ]
 
     # Create boxes
-    print("\nCreating 3D boxes...")
-    for i, item in enumerate(items):
-        color = colors[i % len(colors)]
-        box = create_box(
-            item['item_id'],
-            item['position'],
-            item['dimensions'],
-            color
-        )
-        print(f"  ✓ {item['item_id']}")
+    print("\nPlacing 3D boxes...")
+    update_boxes(items, colors)
 
     # Add labels
+    clear_labels()
     if add_labels:
         print("\nAdding labels...")
         add_text_labels(items)
 
     # Setup render
-    setup_render_settings(output_path)
+    setup_render_settings(output_path, quality, preview)
 
     # Render
     print(f"\nRendering to: {output_path}")
-    print("This may take 30-60 seconds...")
+    if quality == "high" and not preview:
+        print("This may take 30-60 seconds...")
 
     bpy.ops.render.render(write_still=True)
 
@@ -376,13 +696,17 @@ def parse_args():
 
     parser = argparse.ArgumentParser(description='Blender truck visualization')
     parser.add_argument('--truck-image', help='Path to truck PNG')
-    parser.add_argument('--packing-data', default='/tmp/truck_loading_plan.json',
-                       help='Path to packing JSON')
-    parser.add_argument('--output', default='/tmp/truck_blender_render.png',
-                       help='Output image path')
+    parser.add_argument('--packing-data', nargs='+', default=['/tmp/truck_loading_plan.json'],
+                       help='Path to packing JSON (several render back-to-back in one scene)')
+    parser.add_argument('--output', nargs='+', default=['/tmp/truck_blender_render.png'],
+                       help='Output image path, one per packing JSON')
     parser.add_argument('--width', type=int, default=1920, help='Image width')
     parser.add_argument('--height', type=int, default=1080, help='Image height')
     parser.add_argument('--no-labels', action='store_true', help='Skip text labels')
+    parser.add_argument('--quality', choices=['fast', 'high'], default='fast',
+                       help='fast = EEVEE, high = Cycles path tracing')
+    parser.add_argument('--preview', action='store_true',
+                       help='Render at 50%% resolution with fewer samples')
 
     return parser.parse_args(argv)
 
@@ -400,15 +724,22 @@ if __name__ == "__main__":
 
     args = parse_args()
 
-    # Run visualization
-    create_visualization(
-        truck_image_path=args.truck_image,
-        packing_data_path=args.packing_data,
-        output_path=args.output,
-        image_width=args.width,
-        image_height=args.height,
-        add_labels=not args.no_labels
-    )
+    if len(args.packing_data) != len(args.output):
+        print("❌ --packing-data and --output need the same number of paths")
+        sys.exit(1)
+
+    # Run visualization; later plans reuse the scene built for the first
+    for packing_data_path, output_path in zip(args.packing_data, args.output):
+        create_visualization(
+            truck_image_path=args.truck_image,
+            packing_data_path=packing_data_path,
+            output_path=output_path,
+            image_width=args.width,
+            image_height=args.height,
+            add_labels=not args.no_labels,
+            quality=args.quality,
+            preview=args.preview
+        )
 
     print("\n" + "=" * 70)
     print(" ✅ DONE!")
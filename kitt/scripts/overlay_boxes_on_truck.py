@@ -4,46 +4,113 @@ Uses PIL to draw boxes with manual perspective calibration
 """
 
 import json
+import math
+import os
+import stat
 import sys
 from pathlib import Path
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import argparse
 
+from plan_io import load_plan
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # Corners are projected with NumPy broadcasting instead
+
+
+# Unit corner offsets: bottom face (0-3) then top face (4-7)
+_CORNER_OFFSETS = np.array([
+    [0, 0, 0], [1, 0, 0], [1, 0, 1], [0, 0, 1],
+    [0, 1, 0], [1, 1, 0], [1, 1, 1], [0, 1, 1],
+], dtype=np.float32)
+
+# All 12 edges as one polyline: bottom face, up to the top face, then
+# back down the remaining verticals (re-tracing 4-5, 1-2 and 6-7)
+_EDGE_PATH = np.array([0, 1, 2, 3, 0, 4, 5, 6, 7, 4, 5, 1, 2, 6, 7, 3], dtype=np.int8)
+_FRONT_FACE = np.array([0, 1, 5, 4], dtype=np.int8)
+_TOP_FACE = np.array([4, 5, 6, 7], dtype=np.int8)
+
+
+CALIBRATION_KEYS = (
+    "origin_x", "origin_y",
+    "scale_x", "scale_y", "scale_z",
+    "angle_x", "angle_y", "angle_z",
+)
+
+
+def default_calibration(image_height: int):
+    """Default side-view perspective (may not align perfectly)"""
+    return {
+        "origin_x": 100,
+        "origin_y": image_height - 100,
+        "scale_x": 1.0,
+        "scale_y": 1.0,
+        "scale_z": 0.5,
+        "angle_x": 0,
+        "angle_y": 90,
+        "angle_z": 30
+    }
+
 
-def calibrate_perspective(truck_image_path: str):
+def calibrate_perspective(truck_image_path: str, *, points: dict = None):
     """
-    Interactive tool to calibrate perspective for your truck image
+    Calibrate perspective for your truck image
 
     You'll need to identify 4 reference points in your truck image:
     1. Container origin (bottom-left-front corner)
     2. X-axis vanishing point (width direction)
     3. Y-axis vanishing point (height direction)
     4. Z-axis vanishing point (depth direction)
+
+    Args:
+        truck_image_path: Path to truck image
+        points: Calibration values keyed by CALIBRATION_KEYS. When omitted
+            the values are prompted for, which requires an interactive terminal.
+
+    Returns:
+        Calibration dict, or None if no values could be obtained
     """
-    img = Image.open(truck_image_path)
+    if points is not None:
+        missing = [key for key in CALIBRATION_KEYS if key not in points]
+        if missing:
+            print(f"❌ Calibration points missing: {', '.join(missing)}")
+            return None
 
-    print("=" * 70)
-    print(" TRUCK IMAGE PERSPECTIVE CALIBRATION")
-    print("=" * 70)
-    print(f"\nImage size: {img.size[0]}×{img.size[1]} pixels")
-    print("\nTo overlay boxes accurately, we need to calibrate perspective.")
-    print("\nLook at your truck image and identify these points:")
-    print("  1. Container origin (where X=0, Y=0, Z=0)")
-    print("  2. X-axis direction (width - left to right)")
-    print("  3. Y-axis direction (height - bottom to top)")
-    print("  4. Z-axis direction (depth - front to back)")
-
-    # Manual calibration values
-    calibration = {
-        "origin_x": int(input("\nContainer origin X pixel (left edge): ")),
-        "origin_y": int(input("Container origin Y pixel (bottom edge): ")),
-        "scale_x": float(input("X-axis scale (pixels per cm): ")),
-        "scale_y": float(input("Y-axis scale (pixels per cm): ")),
-        "scale_z": float(input("Z-axis scale (pixels per cm): ")),
-        "angle_x": float(input("X-axis angle in degrees (0=horizontal right): ")),
-        "angle_y": float(input("Y-axis angle in degrees (90=vertical up): ")),
-        "angle_z": float(input("Z-axis angle in degrees (perspective depth): "))
-    }
+        calibration = {
+            key: (int if key.startswith("origin") else float)(points[key])
+            for key in CALIBRATION_KEYS
+        }
+    elif not sys.stdin.isatty():
+        print("❌ Calibration needs an interactive terminal or --points JSON")
+        return None
+    else:
+        img = Image.open(truck_image_path)
+
+        print("=" * 70)
+        print(" TRUCK IMAGE PERSPECTIVE CALIBRATION")
+        print("=" * 70)
+        print(f"\nImage size: {img.size[0]}×{img.size[1]} pixels")
+        print("\nTo overlay boxes accurately, we need to calibrate perspective.")
+        print("\nLook at your truck image and identify these points:")
+        print("  1. Container origin (where X=0, Y=0, Z=0)")
+        print("  2. X-axis direction (width - left to right)")
+        print("  3. Y-axis direction (height - bottom to top)")
+        print("  4. Z-axis direction (depth - front to back)")
+
+        # Manual calibration values
+        calibration = {
+            "origin_x": int(input("\nContainer origin X pixel (left edge): ")),
+            "origin_y": int(input("Container origin Y pixel (bottom edge): ")),
+            "scale_x": float(input("X-axis scale (pixels per cm): ")),
+            "scale_y": float(input("Y-axis scale (pixels per cm): ")),
+            "scale_z": float(input("Z-axis scale (pixels per cm): ")),
+            "angle_x": float(input("X-axis angle in degrees (0=horizontal right): ")),
+            "angle_y": float(input("Y-axis angle in degrees (90=vertical up): ")),
+            "angle_z": float(input("Z-axis angle in degrees (perspective depth): "))
+        }
 
     # Save calibration
     calib_file = Path(truck_image_path).with_suffix('.calib.json')
@@ -54,74 +121,114 @@ def calibrate_perspective(truck_image_path: str):
     return calibration
 
 
+def precompute_trig(calibration):
+    """
+    Cache the calibration's axis cosines/sines under _cos*/_sin* keys
+    so projections multiply instead of re-evaluating trig per point
+    """
+    calibration['_cosx'] = math.cos(math.radians(calibration['angle_x']))
+    calibration['_cosy'] = math.cos(math.radians(calibration['angle_y']))
+    calibration['_cosz'] = math.cos(math.radians(calibration['angle_z']))
+    calibration['_sinz'] = math.sin(math.radians(calibration['angle_z']))
+    return calibration
+
+
 def transform_3d_to_2d(x3d, y3d, z3d, calibration):
     """
     Transform 3D coordinates to 2D image coordinates
     using calibrated perspective
     """
-    import math
-
-    # Convert angles to radians
-    angle_x = math.radians(calibration['angle_x'])
-    angle_y = math.radians(calibration['angle_y'])
-    angle_z = math.radians(calibration['angle_z'])
+    if '_cosx' not in calibration:
+        precompute_trig(calibration)
 
     # Project 3D point to 2D
     x2d = calibration['origin_x'] + \
-          x3d * calibration['scale_x'] * math.cos(angle_x) + \
-          z3d * calibration['scale_z'] * math.cos(angle_z)
+          x3d * calibration['scale_x'] * calibration['_cosx'] + \
+          z3d * calibration['scale_z'] * calibration['_cosz']
 
     y2d = calibration['origin_y'] - \
-          y3d * calibration['scale_y'] * math.cos(angle_y) - \
-          z3d * calibration['scale_z'] * math.sin(angle_z)
+          y3d * calibration['scale_y'] * calibration['_cosy'] - \
+          z3d * calibration['scale_z'] * calibration['_sinz']
 
     return int(x2d), int(y2d)
 
 
-def draw_box_on_image(draw, item, calibration, color):
+def projection_matrix(calibration):
     """
-    Draw a 3D box onto the image using calibrated perspective
+    Build the 3×2 matrix mapping (x, y, z) in cm to pixel offsets
+    from the calibrated origin (same projection as transform_3d_to_2d)
     """
-    pos = item['position']
-    dims = item['dimensions']
-
-    # Calculate 8 corners of the box
-    corners_3d = [
-        # Bottom face
-        (pos['x'], pos['y'], pos['z']),
-        (pos['x'] + dims['width'], pos['y'], pos['z']),
-        (pos['x'] + dims['width'], pos['y'], pos['z'] + dims['depth']),
-        (pos['x'], pos['y'], pos['z'] + dims['depth']),
-        # Top face
-        (pos['x'], pos['y'] + dims['height'], pos['z']),
-        (pos['x'] + dims['width'], pos['y'] + dims['height'], pos['z']),
-        (pos['x'] + dims['width'], pos['y'] + dims['height'], pos['z'] + dims['depth']),
-        (pos['x'], pos['y'] + dims['height'], pos['z'] + dims['depth']),
-    ]
+    if '_cosx' not in calibration:
+        precompute_trig(calibration)
+
+    return np.array([
+        [calibration['scale_x'] * calibration['_cosx'], 0.0],
+        [0.0, -calibration['scale_y'] * calibration['_cosy']],
+        [calibration['scale_z'] * calibration['_cosz'], -calibration['scale_z'] * calibration['_sinz']],
+    ])
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _project_boxes(positions, dims, offsets, proj, origin):
+        """Project every box corner in one compiled loop, without temporaries"""
+        n = positions.shape[0]
+        out = np.empty((n, 8, 2), dtype=np.int64)
+        for b in range(n):
+            for c in range(8):
+                x = positions[b, 0] + dims[b, 0] * offsets[c, 0]
+                y = positions[b, 1] + dims[b, 1] * offsets[c, 1]
+                z = positions[b, 2] + dims[b, 2] * offsets[c, 2]
+                out[b, c, 0] = int(origin[0] + x * proj[0, 0] + y * proj[1, 0] + z * proj[2, 0])
+                out[b, c, 1] = int(origin[1] + x * proj[0, 1] + y * proj[1, 1] + z * proj[2, 1])
+        return out
+
+
+def project_boxes(items, calibration):
+    """
+    Project the 8 corners of every box in one batch
 
-    # Transform to 2D
-    corners_2d = [transform_3d_to_2d(x, y, z, calibration) for x, y, z in corners_3d]
-
-    # Draw edges
-    edges = [
-        # Bottom face
-        (0, 1), (1, 2), (2, 3), (3, 0),
-        # Top face
-        (4, 5), (5, 6), (6, 7), (7, 4),
-        # Vertical edges
-        (0, 4), (1, 5), (2, 6), (3, 7)
-    ]
+    Returns:
+        (N, 8, 2) int array of pixel coordinates, corners ordered
+        bottom face (0-3) then top face (4-7)
+    """
+    positions = np.array(
+        [(i['position']['x'], i['position']['y'], i['position']['z']) for i in items],
+        dtype=float
+    ).reshape(-1, 3)
+    dims = np.array(
+        [(i['dimensions']['width'], i['dimensions']['height'], i['dimensions']['depth']) for i in items],
+        dtype=float
+    ).reshape(-1, 3)
+
+    origin = np.array([calibration['origin_x'], calibration['origin_y']], dtype=float)
+    proj = projection_matrix(calibration)
+
+    if njit is not None:
+        return _project_boxes(positions, dims, _CORNER_OFFSETS.astype(float), proj, origin)
 
-    for start, end in edges:
-        draw.line([corners_2d[start], corners_2d[end]], fill=color, width=3)
+    corners_3d = positions[:, None, :] + dims[:, None, :] * _CORNER_OFFSETS  # (N, 8, 3)
+    return (origin + corners_3d @ proj).astype(int)
+
+
+def draw_box_on_image(draw, corners, color):
+    """
+    Draw a 3D box onto the image from its projected corners
+
+    Args:
+        draw: ImageDraw instance
+        corners: (8, 2) pixel coordinates from project_boxes
+        color: RGBA tuple
+    """
+    draw.line([tuple(p) for p in corners[_EDGE_PATH].tolist()], fill=color, width=3, joint='curve')
 
     # Draw faces (semi-transparent)
     # Front face
-    draw.polygon([corners_2d[0], corners_2d[1], corners_2d[5], corners_2d[4]],
+    draw.polygon([tuple(p) for p in corners[_FRONT_FACE].tolist()],
                  fill=(*color[:3], 100), outline=color)
 
     # Top face
-    draw.polygon([corners_2d[4], corners_2d[5], corners_2d[6], corners_2d[7]],
+    draw.polygon([tuple(p) for p in corners[_TOP_FACE].tolist()],
                  fill=(*color[:3], 120), outline=color)
 
 
@@ -130,23 +237,32 @@ def overlay_boxes(
     packing_data_path: str,
     output_path: str,
     calibration_file: str = None,
-    auto_calibrate: bool = False
+    auto_calibrate: bool = False,
+    assume_default: bool = False
 ):
     """
     Overlay packing boxes onto truck image
+
+    Without a calibration file the default side-view perspective is used when
+    auto_calibrate or assume_default is set; otherwise the user is asked, and
+    the overlay is skipped if stdin is not a terminal.
     """
-    # Load truck image
-    if not Path(truck_image_path).exists():
+    # Load truck image; /dev/null and other non-regular or empty files can't be decoded
+    try:
+        st = os.stat(truck_image_path)
+    except FileNotFoundError:
         print(f"❌ Truck image not found: {truck_image_path}")
         return False
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        print(f"❌ Truck image is not a regular, non-empty file: {truck_image_path}")
+        return False
 
     img = Image.open(truck_image_path)
     img = img.convert('RGBA')  # Enable transparency
     draw = ImageDraw.Draw(img, 'RGBA')
 
     # Load packing data
-    with open(packing_data_path) as f:
-        data = json.load(f)
+    data = load_plan(packing_data_path)
 
     # Load or create calibration
     if calibration_file and Path(calibration_file).exists():
@@ -156,39 +272,27 @@ def overlay_boxes(
     elif auto_calibrate:
         print("⚠️  Auto-calibration not yet implemented")
         print("Using default side-view perspective...")
-        # Default calibration for side view
-        calibration = {
-            "origin_x": 100,
-            "origin_y": img.size[1] - 100,
-            "scale_x": 1.0,
-            "scale_y": 1.0,
-            "scale_z": 0.5,
-            "angle_x": 0,
-            "angle_y": 90,
-            "angle_z": 30
-        }
+        calibration = default_calibration(img.size[1])
+    elif assume_default:
+        print("Using default side-view perspective...")
+        calibration = default_calibration(img.size[1])
     else:
         print("\n⚠️  No calibration file provided.")
         print("Options:")
         print("  1. Run with --calibrate to interactively calibrate")
         print("  2. Provide --calibration-file path/to/calibration.json")
-        print("  3. Use default perspective (may not align perfectly)")
+        print("  3. Run with --assume-default to use the default perspective (may not align perfectly)")
+
+        if not sys.stdin.isatty():
+            return False
 
         use_default = input("\nUse default perspective? (y/n): ").lower() == 'y'
         if not use_default:
             return False
 
-        # Default side view
-        calibration = {
-            "origin_x": 100,
-            "origin_y": img.size[1] - 100,
-            "scale_x": 1.0,
-            "scale_y": 1.0,
-            "scale_z": 0.5,
-            "angle_x": 0,
-            "angle_y": 90,
-            "angle_z": 30
-        }
+        calibration = default_calibration(img.size[1])
+
+    precompute_trig(calibration)
 
     # Color palette
     colors = [
@@ -202,9 +306,10 @@ def overlay_boxes(
 
     # Draw boxes
     print(f"\nDrawing {len(data['items'])} boxes...")
+    corners = project_boxes(data['items'], calibration)
     for i, item in enumerate(data['items']):
         color = colors[i % len(colors)]
-        draw_box_on_image(draw, item, calibration, color)
+        draw_box_on_image(draw, corners[i], color)
         print(f"  ✓ {item['item_id']}")
 
     # Save result
@@ -225,7 +330,11 @@ def main():
                        help='Output image path')
     parser.add_argument('--calibration-file', help='Path to calibration JSON')
     parser.add_argument('--calibrate', action='store_true',
-                       help='Run interactive calibration')
+                       help='Run calibration (interactive unless --points is given)')
+    parser.add_argument('--points',
+                       help='Calibration values as a JSON object, e.g. \'{"origin_x": 120, ...}\'')
+    parser.add_argument('--assume-default', action='store_true',
+                       help='Use the default perspective when no calibration file is given')
 
     args = parser.parse_args()
 
@@ -235,7 +344,9 @@ def main():
 
     # Calibration mode
     if args.calibrate:
-        calibrate_perspective(args.truck_image)
+        points = json.loads(args.points) if args.points else None
+        if calibrate_perspective(args.truck_image, points=points) is None:
+            sys.exit(1)
         print("\nNow run again without --calibrate to overlay boxes")
         return
 
@@ -244,7 +355,8 @@ def main():
         truck_image_path=args.truck_image,
         packing_data_path=args.packing_data,
         output_path=args.output,
-        calibration_file=args.calibration_file
+        calibration_file=args.calibration_file,
+        assume_default=args.assume_default
     )
 
     if success:
@@ -0,0 +1,31 @@
+"""
+Packing plan loading shared by the visualization scripts
+Decodes with msgspec when available, falling back to the json module
+"""
+
+import gc
+import json
+
+try:
+    import msgspec
+    # C-level decoder reused for every plan; yields plain dicts and lists
+    _decode_json = msgspec.json.Decoder().decode
+except ImportError:
+    msgspec = None
+    _decode_json = json.loads
+
+
+def load_plan(path):
+    """Load a packing plan JSON file (e.g. /tmp/truck_loading_plan.json)"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    # Decoding a large plan allocates one dict per item and coordinate; none of
+    # them can form cycles, so don't let the cyclic GC rescan them mid-decode
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _decode_json(raw)
+    finally:
+        if gc_enabled:
+            gc.enable()
@@ -4,15 +4,19 @@ Test All Visualization Methods
 Runs all 4 visualization methods and generates comparison outputs
 """
 
+import asyncio
+import os
+import shlex
 import sys
 import subprocess
 from pathlib import Path
 import time
-import json
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from plan_io import load_plan
+
 
 def print_header(text):
     """Print a formatted header"""
@@ -27,45 +31,73 @@ def print_step(step_num, text):
     print("-" * 70)
 
 
-def run_command(cmd, description, check=True):
-    """Run a shell command and print results"""
-    print(f"\n$ {cmd}")
+async def run_command(cmd, description, semaphore, check=True, cwd=None):
+    """
+    Run a command without a shell and capture its output
+
+    Returns a result dict; pass it to report_command to print the output,
+    so concurrent steps don't interleave their logs.
+    """
     start_time = time.time()
 
-    try:
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            check=check,
-            capture_output=True,
-            text=True
-        )
-        elapsed = time.time() - start_time
+    async with semaphore:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *shlex.split(cmd),
+                cwd=cwd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await proc.communicate()
+            returncode = proc.returncode
+        except FileNotFoundError as e:
+            stdout, stderr, returncode = b"", str(e).encode(), 127
+
+    return {
+        "cmd": cmd,
+        "description": description,
+        "success": returncode == 0 or not check,
+        "returncode": returncode,
+        "elapsed": time.time() - start_time,
+        "stdout": stdout.decode(errors="replace"),
+        "stderr": stderr.decode(errors="replace"),
+    }
+
+
+def report_command(result):
+    """Print the buffered output of a finished command"""
+    print(f"\n$ {result['cmd']}")
+
+    if result["success"]:
+        if result["stdout"]:
+            print(result["stdout"])
+        if result["stderr"] and result["returncode"] != 0:
+            print(f"ERROR: {result['stderr']}")
+        print(f"✅ Completed in {result['elapsed']:.1f}s")
+    else:
+        print(f"❌ Failed in {result['elapsed']:.1f}s")
+        print(f"Error: {result['stderr']}")
 
-        if result.stdout:
-            print(result.stdout)
-        if result.stderr and result.returncode != 0:
-            print(f"ERROR: {result.stderr}")
+    return result["success"]
 
-        print(f"✅ Completed in {elapsed:.1f}s")
-        return True
-    except subprocess.CalledProcessError as e:
-        elapsed = time.time() - start_time
-        print(f"❌ Failed in {elapsed:.1f}s")
-        print(f"Error: {e.stderr}")
-        return False
+
+def stat_file(path):
+    """Return (exists, size in bytes) with a single stat call"""
+    try:
+        return True, os.stat(path).st_size
+    except FileNotFoundError:
+        return False, 0
 
 
 def check_file(path, description):
-    """Check if a file exists and print its size"""
-    if Path(path).exists():
-        size = Path(path).stat().st_size
+    """Check if a file exists and print its size; returns (exists, size)"""
+    exists, size = stat_file(path)
+    if exists:
         size_mb = size / (1024 * 1024)
         print(f"✅ {description}: {path} ({size_mb:.2f} MB)")
-        return True
     else:
         print(f"❌ {description}: {path} NOT FOUND")
-        return False
+    return exists, size
 
 
 def check_blender():
@@ -86,21 +118,25 @@ def check_blender():
         return False
 
 
-def main():
+async def main(truck_image=None):
     print_header("VISUALIZATION METHODS - COMPLETE TEST")
 
-    # Change to kitt directory
     kitt_dir = Path(__file__).parent.parent
     print(f"Working directory: {kitt_dir}")
 
+    # Cap concurrent renders at the number of cores
+    semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
     # Step 1: Generate packing data
     print_step(1, "Generate Packing Data")
     print("Running DeepPack3D with real truck dimensions...")
 
-    success = run_command(
-        f"cd {kitt_dir} && python3 tests/test_real_truck_packing.py",
-        "Generate packing data"
-    )
+    success = report_command(await run_command(
+        "python3 tests/test_real_truck_packing.py",
+        "Generate packing data",
+        semaphore,
+        cwd=kitt_dir
+    ))
 
     if not success:
         print("\n❌ Failed to generate packing data. Aborting.")
@@ -108,13 +144,12 @@ def main():
 
     # Verify packing data exists
     packing_file = "/tmp/truck_loading_plan.json"
-    if not check_file(packing_file, "Packing data"):
+    if not check_file(packing_file, "Packing data")[0]:
         print("\n❌ Packing data not found. Aborting.")
         return 1
 
     # Load and display packing data summary
-    with open(packing_file) as f:
-        data = json.load(f)
+    data = load_plan(packing_file)
 
     print(f"\n📦 Packing Summary:")
     print(f"   Container: {data['container']['dimensions']['width']}×"
@@ -125,61 +160,86 @@ def main():
     print(f"   Algorithm: {data['stats']['algorithm']}")
     print(f"   Computation: {data['stats']['computation_ms']}ms")
 
+    # Steps 2-4 only read the packing data, so run them concurrently and
+    # report each one in order once everything has finished
+    output1 = "/tmp/truck_viz_option1_isometric.png"
+    output2 = "/tmp/truck_viz_option2_overlay.png"
+    output3 = "/tmp/truck_viz_option3_blender.png"
+
+    print("\nChecking for Blender...")
+    has_blender = check_blender()
+
+    print("\nRunning visualization steps 2-4 in parallel...")
+    if has_blender:
+        print("Blender render may take 30-60 seconds...")
+
+    steps = {
+        "isometric": run_command(
+            f"python3 scripts/visualize_truck_loading.py "
+            f"--packing-data {packing_file} "
+            f"--output {output1}",
+            "PIL Isometric",
+            semaphore,
+            cwd=kitt_dir
+        ),
+    }
+    # The overlay needs a real truck photo; don't launch it just to fail
+    if truck_image:
+        steps["overlay"] = run_command(
+            f"python3 scripts/overlay_boxes_on_truck.py "
+            f"--truck-image {shlex.quote(truck_image)} "
+            f"--packing-data {packing_file} "
+            f"--output {output2} "
+            f"--assume-default",
+            "PIL Overlay",
+            semaphore,
+            check=False,  # Allow failure if calibration doesn't fit
+            cwd=kitt_dir
+        )
+    if has_blender:
+        steps["blender"] = run_command(
+            f"blender --background --python {kitt_dir}/scripts/blender_truck_visualization.py -- "
+            f"--packing-data {packing_file} "
+            f"--output {output3} "
+            f"--width 960 "  # Test resolution; see Next Steps for full-size renders
+            f"--height 540 "
+            f"--no-labels",
+            "Blender Render",
+            semaphore
+        )
+
+    results = dict(zip(steps, await asyncio.gather(*steps.values())))
+
+    # (exists, size) per output, reused by the summary below
+    file_status = {}
+
     # Step 2: Option 1 - PIL Isometric
     print_step(2, "Option 1: PIL Isometric View")
     print("Generating isometric 3D visualization...")
 
-    output1 = "/tmp/truck_viz_option1_isometric.png"
-    success = run_command(
-        f"cd {kitt_dir} && python3 scripts/visualize_truck_loading.py "
-        f"--packing-data {packing_file} "
-        f"--output {output1}",
-        "PIL Isometric"
-    )
-
-    if success:
-        check_file(output1, "Option 1 output")
+    if report_command(results["isometric"]):
+        file_status[output1] = check_file(output1, "Option 1 output")
 
     # Step 3: Option 2 - PIL Overlay (with default calibration)
     print_step(3, "Option 2: PIL Perspective Overlay")
     print("Generating perspective overlay (using default calibration)...")
     print("Note: For best results, run with --calibrate and your truck image")
 
-    output2 = "/tmp/truck_viz_option2_overlay.png"
-    success = run_command(
-        f"cd {kitt_dir} && python3 scripts/overlay_boxes_on_truck.py "
-        f"--truck-image /dev/null "  # No truck image for this test
-        f"--packing-data {packing_file} "
-        f"--output {output2}",
-        "PIL Overlay",
-        check=False  # Allow failure if no truck image
-    )
-
-    if success:
-        check_file(output2, "Option 2 output")
+    if "overlay" not in results:
+        print("⚠️  Skipped (pass --truck-image to overlay onto a truck photo)")
+    elif report_command(results["overlay"]):
+        file_status[output2] = check_file(output2, "Option 2 output")
     else:
-        print("⚠️  Skipped (requires truck image and calibration)")
+        print("⚠️  Failed (check the truck image and calibration)")
 
     # Step 4: Option 3 - Blender (if available)
     print_step(4, "Option 3: Blender Photorealistic Rendering")
 
-    if check_blender():
+    if has_blender:
         print("Generating photorealistic render with Blender...")
-        print("This may take 30-60 seconds...")
-
-        output3 = "/tmp/truck_viz_option3_blender.png"
-        success = run_command(
-            f"blender --background --python {kitt_dir}/scripts/blender_truck_visualization.py -- "
-            f"--packing-data {packing_file} "
-            f"--output {output3} "
-            f"--width 1920 "
-            f"--height 1080 "
-            f"--no-labels",
-            "Blender Render"
-        )
 
-        if success:
-            check_file(output3, "Option 3 output")
+        if report_command(results["blender"]):
+            file_status[output3] = check_file(output3, "Option 3 output")
     else:
         print("⚠️  Skipped (Blender not installed)")
 
@@ -203,12 +263,13 @@ def main():
     outputs = [
         ("Option 1 (PIL Isometric)", output1),
         ("Option 2 (PIL Overlay)", output2),
-        ("Option 3 (Blender)", "/tmp/truck_viz_option3_blender.png"),
+        ("Option 3 (Blender)", output3),
     ]
 
     for name, path in outputs:
-        if Path(path).exists():
-            size = Path(path).stat().st_size / (1024 * 1024)
+        exists, size = file_status.get(path) or stat_file(path)
+        if exists:
+            size = size / (1024 * 1024)
             print(f"✅ {name:30} → {path} ({size:.2f} MB)")
         else:
             print(f"⚠️  {name:30} → Not generated")
@@ -241,4 +302,10 @@ def main():
 
 
 if __name__ == "__main__":
-    exit(main())
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run all visualization methods')
+    parser.add_argument('--truck-image', help='Truck photo for the PIL overlay step (skipped if omitted)')
+    args = parser.parse_args()
+
+    exit(asyncio.run(main(truck_image=args.truck_image)))
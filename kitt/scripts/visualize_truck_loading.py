@@ -3,76 +3,97 @@
 Overlays packed boxes onto a truck/container image
 """
 
-import json
 import sys
+from functools import lru_cache
 from pathlib import Path
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import argparse
 
+from plan_io import load_plan
 
-def draw_3d_box(draw, x, y, width, height, depth, color, scale_x, scale_y, offset_x=50, offset_y=50):
-    """
-    Draw a 3D box in isometric view
 
-    Args:
-        draw: PIL ImageDraw object
-        x, y: Position in 3D space (cm)
-        width, height, depth: Box dimensions (cm)
-        color: Box color
-        scale_x, scale_y: Scaling factors for visualization
-        offset_x, offset_y: Offset from image edge
-    """
-    # Convert 3D coordinates to 2D isometric projection
-    # Isometric: x goes right, y goes up, z goes diagonally down-right
+# Isometric projection angles (30° for x and z axes)
+ISO_X = 0.866  # cos(30°) ≈ 0.866
+ISO_Z = 0.5    # sin(30°) = 0.5
 
-    # Scale down to fit image
-    x_scaled = x * scale_x
-    y_scaled = y * scale_y
-    w_scaled = width * scale_x
-    h_scaled = height * scale_y
-    d_scaled = depth * scale_x  # depth uses x scaling
-
-    # Isometric projection angles (30° for x and z axes)
-    iso_x_angle = 0.866  # cos(30°) ≈ 0.866
-    iso_z_angle = 0.5    # sin(30°) = 0.5
-
-    # Calculate 8 corners of the box in isometric 2D space
-    # Bottom face (y=0)
-    p1 = (
-        offset_x + x_scaled,
-        offset_y - y_scaled
-    )
-    p2 = (
-        offset_x + x_scaled + w_scaled * iso_x_angle,
-        offset_y - y_scaled + w_scaled * iso_z_angle
-    )
-    p3 = (
-        offset_x + x_scaled + w_scaled * iso_x_angle - d_scaled * iso_x_angle,
-        offset_y - y_scaled + w_scaled * iso_z_angle + d_scaled * iso_z_angle
-    )
-    p4 = (
-        offset_x + x_scaled - d_scaled * iso_x_angle,
-        offset_y - y_scaled + d_scaled * iso_z_angle
+# Per-corner coefficients of the scaled width, depth and height; corners
+# 0-3 are the bottom face, 4-7 the same corners raised by the height
+_CORNER_X_W = np.array([0, ISO_X, ISO_X, 0] * 2)
+_CORNER_X_D = np.array([0, 0, -ISO_X, -ISO_X] * 2)
+_CORNER_Y_W = np.array([0, ISO_Z, ISO_Z, 0] * 2)
+_CORNER_Y_D = np.array([0, 0, ISO_Z, ISO_Z] * 2)
+_CORNER_Y_H = np.array([0, 0, 0, 0, -1, -1, -1, -1])
+
+# Visible faces in draw order: top, right, left
+_FACES = np.array([[4, 5, 6, 7], [1, 2, 6, 5], [0, 3, 7, 4]])
+
+
+def shade_faces(color):
+    """Top (lightest), right (medium) and left (darkest) face colors"""
+    return (
+        tuple(min(255, int(c * 1.3)) for c in color),
+        color,
+        tuple(int(c * 0.7) for c in color),
     )
 
-    # Top face (y=height)
-    p5 = (p1[0], p1[1] - h_scaled)
-    p6 = (p2[0], p2[1] - h_scaled)
-    p7 = (p3[0], p3[1] - h_scaled)
-    p8 = (p4[0], p4[1] - h_scaled)
 
-    # Draw faces
-    # Top face (lightest)
-    top_color = tuple(min(255, int(c * 1.3)) for c in color)
-    draw.polygon([p5, p6, p7, p8], fill=top_color, outline=(0, 0, 0, 255))
+# Color palette for different items
+COLORS = [
+    (255, 100, 100, 200),  # Red
+    (100, 255, 100, 200),  # Green
+    (100, 100, 255, 200),  # Blue
+    (255, 255, 100, 200),  # Yellow
+    (255, 100, 255, 200),  # Magenta
+    (100, 255, 255, 200),  # Cyan
+    (255, 150, 100, 200),  # Orange
+    (150, 100, 255, 200),  # Purple
+]
+CONTAINER_COLOR = (200, 200, 200, 100)  # Semi-transparent gray
+
+# Shaded (top, right, left) face colors, computed once per palette entry
+COLOR_FACES = [shade_faces(color) for color in COLORS]
+CONTAINER_FACES = shade_faces(CONTAINER_COLOR)
+
+
+@lru_cache(maxsize=4)
+def load_fonts(size_big=24, size_small=18):
+    """Load the (title, body) fonts once; falls back to PIL's default font"""
+    try:
+        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", size_big)
+        small_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", size_small)
+    except OSError:
+        font = ImageFont.load_default()
+        small_font = ImageFont.load_default()
+    return font, small_font
+
+
+def isometric_corners(positions, dims, scale, offset_x=50, offset_y=50):
+    """
+    Project the 8 corners of every box in isometric view
+
+    Isometric: x goes right, y goes up, z goes diagonally down-right
+
+    Args:
+        positions: (N, 3) box positions in 3D space (cm)
+        dims: (N, 3) width, height, depth (cm)
+        scale: Scaling factor for visualization
+        offset_x, offset_y: Offset from image edge
 
-    # Right face (medium)
-    right_color = color
-    draw.polygon([p2, p3, p7, p6], fill=right_color, outline=(0, 0, 0, 255))
+    Returns:
+        (N, 8, 2) float pixel coordinates
+    """
+    # Scale down to fit image
+    base_x = offset_x + positions[:, 0:1] * scale
+    base_y = offset_y - positions[:, 1:2] * scale
+    w = dims[:, 0:1] * scale
+    h = dims[:, 1:2] * scale
+    d = dims[:, 2:3] * scale  # depth uses x scaling
 
-    # Left face (darkest)
-    left_color = tuple(int(c * 0.7) for c in color)
-    draw.polygon([p1, p4, p8, p5], fill=left_color, outline=(0, 0, 0, 255))
+    corners = np.empty((len(positions), 8, 2))
+    corners[:, :, 0] = base_x + w * _CORNER_X_W + d * _CORNER_X_D
+    corners[:, :, 1] = base_y + w * _CORNER_Y_W + d * _CORNER_Y_D + h * _CORNER_Y_H
+    return corners
 
 
 def create_loading_visualization(
@@ -80,7 +101,8 @@ def create_loading_visualization(
     packing_data_path: str,
     output_path: str,
     image_width: int = 1920,
-    image_height: int = 1080
+    image_height: int = 1080,
+    verbose: bool = False
 ):
     """
     Create visualization of truck loading plan
@@ -91,10 +113,10 @@ def create_loading_visualization(
         output_path: Where to save visualization
         image_width: Output image width
         image_height: Output image height
+        verbose: Also list every packed item and its position
     """
     # Load packing data
-    with open(packing_data_path) as f:
-        data = json.load(f)
+    data = load_plan(packing_data_path)
 
     container = data['container']['dimensions']
     items = data['items']
@@ -124,60 +146,39 @@ def create_loading_visualization(
     print(f"Scale factor: {scale:.4f}")
     print(f"Packing {len(items)} items...")
 
-    # Draw container outline first
-    draw_3d_box(
-        draw, 0, 0,
-        container['width'],
-        container['height'],
-        container['depth'],
-        color=(200, 200, 200, 100),  # Semi-transparent gray
-        scale_x=scale,
-        scale_y=scale,
+    # Container outline first, then every item, as one batch
+    positions = np.array(
+        [(0, 0, 0)] + [(it['position']['x'], it['position']['y'], it['position']['z']) for it in items],
+        dtype=float
+    )
+    dims = np.array(
+        [(container['width'], container['height'], container['depth'])]
+        + [(it['dimensions']['width'], it['dimensions']['height'], it['dimensions']['depth']) for it in items],
+        dtype=float
+    )
+    corners = isometric_corners(
+        positions, dims, scale,
         offset_x=container_margin,
         offset_y=image_height - container_margin
     )
-
-    # Color palette for different items
-    colors = [
-        (255, 100, 100, 200),  # Red
-        (100, 255, 100, 200),  # Green
-        (100, 100, 255, 200),  # Blue
-        (255, 255, 100, 200),  # Yellow
-        (255, 100, 255, 200),  # Magenta
-        (100, 255, 255, 200),  # Cyan
-        (255, 150, 100, 200),  # Orange
-        (150, 100, 255, 200),  # Purple
-    ]
-
-    # Draw each item
-    for i, item in enumerate(items):
-        pos = item['position']
-        dims = item['dimensions']
-        color = colors[i % len(colors)]
-
-        draw_3d_box(
-            draw,
-            pos['x'],
-            pos['y'],
-            dims['width'],
-            dims['height'],
-            dims['depth'],
-            color=color,
-            scale_x=scale,
-            scale_y=scale,
-            offset_x=container_margin,
-            offset_y=image_height - container_margin
-        )
-
-        print(f"  ✓ {item['item_id']}: ({pos['x']:.0f}, {pos['y']:.0f}, {pos['z']:.0f})")
+    # Flat [x0, y0, ..., x3, y3] per face, which ImageDraw takes as is
+    coords = corners[:, _FACES].reshape(-1, 8)  # (3*(N+1), 8)
+    face_colors = list(CONTAINER_FACES)
+    for i in range(len(items)):
+        face_colors.extend(COLOR_FACES[i % len(COLOR_FACES)])
+
+    if verbose:
+        lines = []
+        for item in items:
+            pos = item['position']
+            lines.append(f"  ✓ {item['item_id']}: ({pos['x']:.0f}, {pos['y']:.0f}, {pos['z']:.0f})")
+        print("\n".join(lines))
+
+    for polygon, fill in zip(coords.tolist(), face_colors):
+        draw.polygon(polygon, fill=fill, outline=(0, 0, 0, 255))
 
     # Add legend/stats
-    try:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-        small_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
-    except:
-        font = ImageFont.load_default()
-        small_font = ImageFont.load_default()
+    font, small_font = load_fonts()
 
     # Title
     draw.text((20, 20), "TRUCK LOADING PLAN", fill=(0, 0, 0), font=font)
@@ -203,7 +204,7 @@ def create_loading_visualization(
     draw.text((legend_x, 20), "ITEMS", fill=(0, 0, 0), font=font)
 
     for i, item in enumerate(items):
-        color = colors[i % len(colors)]
+        color = COLORS[i % len(COLORS)]
         # Draw color box
         draw.rectangle(
             [legend_x, legend_y + i*30, legend_x + 20, legend_y + i*30 + 20],
@@ -231,6 +232,7 @@ def main():
                        help='Output image path')
     parser.add_argument('--width', type=int, default=1920, help='Image width')
     parser.add_argument('--height', type=int, default=1080, help='Image height')
+    parser.add_argument('--verbose', '-v', action='store_true', help='List every packed item')
 
     args = parser.parse_args()
 
@@ -248,7 +250,8 @@ def main():
         packing_data_path=args.packing_data,
         output_path=args.output,
         image_width=args.width,
-        image_height=args.height
+        image_height=args.height,
+        verbose=args.verbose
     )
 
     print("\n" + "=" * 70)
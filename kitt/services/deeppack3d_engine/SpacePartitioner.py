@@ -1,43 +1,45 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 
-from geometry import Cuboid
+from geometry import Cuboid, pack, unpack, intersect_batch, contain_batch
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 class Renderer:
     def __init__(self):
         self.fig = plt.figure()
         self.ax = self.fig.add_subplot(projection='3d')
         plt.close()
+        # filled boxes go into a single Poly3DCollection, built by show()
+        self._faces = []
+        self._face_colors = []
+        self._poly = None
+        # fill colors for draw(color=None), drawn from a batch at a time
+        self._rng = np.random.default_rng()
+        self._color_pool = []
         
     def clear(self):
         self.ax.clear()
+        self._faces = []
+        self._face_colors = []
+        self._poly = None
         
     def draw(self, box, color=None, mode='fill'):
         if color is None:
-            color = (*np.random.random((3,)) * 0.7 + 0.3, 0.6)
+            if not self._color_pool:
+                self._color_pool = _color_pool(self._rng)
+            color = self._color_pool.pop()
             
         ax = self.ax
         x, y, z = box.left, box.back, box.bottom
         dx, dy, dz = box.width, box.depth, box.height
         if mode == 'fill':
-            xx = np.linspace(x, x + dx, 2)
-            yy = np.linspace(y, y + dy, 2)
-            zz = np.linspace(z, z + dz, 2)
-
-            xx, yy = np.meshgrid(xx, yy)
-
-            l1, l2 = xx.shape
-            z0 = np.ones([l1, l2]) * z
-            ax.plot_surface(xx, yy, z0, color=color)
-            ax.plot_surface(xx, yy, z0 + dz, color=color)
-
-            yy, zz = np.meshgrid(yy, zz)
-            ax.plot_surface(x, yy, zz, color=color)
-            ax.plot_surface(x + dx, yy, zz, color=color)
-
-            xx, zz = np.meshgrid(xx, zz)
-            ax.plot_surface(xx, y, zz, color=color)
-            ax.plot_surface(xx, y + dy, zz, color=color)
+            self._faces.append(_box_faces(box))
+            self._face_colors.extend([color] * len(_BOX_FACES))
         elif mode == 'stroke':
             xx = [x, x, x + dx, x + dx, x]
             yy = [y, y + dy, y + dy, y, y]
@@ -51,7 +53,17 @@ class Renderer:
             
         return color
     
+    def _flush(self):
+        if not self._faces:
+            return
+        if self._poly is not None:
+            self._poly.remove()
+        # shaded like plot_surface
+        self._poly = Poly3DCollection(np.concatenate(self._faces), facecolors=self._face_colors, shade=True)
+        self.ax.add_collection3d(self._poly)
+        
     def show(self):
+        self._flush()
         return (self.fig)
         
 def render(size, spaces, colors):
@@ -62,6 +74,105 @@ def render(size, spaces, colors):
 
     r.draw(Cuboid(0, 0, 0, *size), color='red', mode='stroke')
     return r.show()
+
+def _color_pool(rng, n=256):
+    # n random fill colors: rgb in [0.3, 1.0), alpha 0.6
+    pool = np.full((n, 4), 0.6)
+    pool[:, :3] = rng.random((n, 3)) * 0.7 + 0.3
+    return list(map(tuple, pool.tolist()))
+
+# corner indices of the 6 faces of a box: bottom, top, left, right, back, front
+_BOX_FACES = np.array([[0, 1, 2, 3], [4, 5, 6, 7], [0, 3, 7, 4], [1, 2, 6, 5], [0, 1, 5, 4], [3, 2, 6, 7]])
+
+def _box_faces(box):
+    # (6, 4, 3) face quads in plot coordinates (x, y, z) = (left, back, bottom)
+    x, y, z = box.left, box.back, box.bottom
+    dx, dy, dz = box.width, box.depth, box.height
+    corners = np.array([
+        (x, y, z), (x + dx, y, z), (x + dx, y + dy, z), (x, y + dy, z),
+        (x, y, z + dz), (x + dx, y, z + dz), (x + dx, y + dy, z + dz), (x, y + dy, z + dz),
+    ], dtype=np.float32)
+    return corners[_BOX_FACES]
+
+if njit is not None:
+    @njit(cache=True)
+    def _split(bounds, target):
+        # Cuboid.split(target) (maximal) for every row at once, keeping row order
+        # and the left, right, bottom, top, back, front order within a row
+        out = np.empty((6 * bounds.shape[0], 6), dtype=bounds.dtype)
+        n = 0
+        for i in range(bounds.shape[0]):
+            for axis in range(3):
+                # piece below target along this axis: ends where target starts
+                if bounds[i, axis] < target[axis]:
+                    out[n] = bounds[i]
+                    out[n, axis + 3] = target[axis]
+                    n += 1
+                # piece above target along this axis: starts where target ends
+                if bounds[i, axis + 3] > target[axis + 3]:
+                    out[n] = bounds[i]
+                    out[n, axis] = target[axis + 3]
+                    n += 1
+        return out[:n]
+    
+    @njit(cache=True)
+    def _contains_any(bounds, target):
+        # whether any row contains target (Cuboid.contain over bounds rows)
+        for i in range(bounds.shape[0]):
+            inside = True
+            for k in range(3):
+                if bounds[i, k] > target[k] or bounds[i, k + 3] < target[k + 3]:
+                    inside = False
+                    break
+            if inside:
+                return True
+        return False
+
+    @njit(cache=True)
+    def _contained(new, old):
+        # mask of new rows contained by another new row or by any old row
+        out = np.zeros(new.shape[0], dtype=np.bool_)
+        for i in range(new.shape[0]):
+            for j in range(new.shape[0] + old.shape[0]):
+                if j == i:
+                    continue
+                row = new[j] if j < new.shape[0] else old[j - new.shape[0]]
+                inside = True
+                for k in range(3):
+                    if row[k] > new[i, k] or row[k + 3] < new[i, k + 3]:
+                        inside = False
+                        break
+                if inside:
+                    out[i] = True
+                    break
+        return out
+else:
+    def _split(bounds, target):
+        # Cuboid.split(target) (maximal) for every row at once, keeping row order
+        # and the left, right, bottom, top, back, front order within a row
+        pieces = np.repeat(bounds[:, None, :], 6, axis=1)
+        valid = np.empty((len(bounds), 6), dtype=bool)
+        for axis in range(3):
+            lo, hi = 2 * axis, 2 * axis + 1
+            # piece below target along this axis: ends where target starts
+            pieces[:, lo, axis + 3] = target[axis]
+            valid[:, lo] = bounds[:, axis] < target[axis]
+            # piece above target along this axis: starts where target ends
+            pieces[:, hi, axis] = target[axis + 3]
+            valid[:, hi] = bounds[:, axis + 3] > target[axis + 3]
+        return pieces[valid]
+    
+    def _contains_any(bounds, target):
+        return bool(contain_batch(bounds, target).any())
+
+    def _contained(new, old):
+        def contains(outer):
+            # [i, j]: outer row j contains new row i
+            return (np.all(outer[None, :, :3] <= new[:, None, :3], axis=2) &
+                    np.all(outer[None, :, 3:] >= new[:, None, 3:], axis=2))
+        by_new = contains(new)
+        np.fill_diagonal(by_new, False)
+        return by_new.any(axis=1) | contains(old).any(axis=1)
     
 class SpacePartitioner:
     def __init__(self, size):
@@ -72,8 +183,39 @@ class SpacePartitioner:
     def reset(self):
         w, h, d = self.size
         self.free_splits = [Cuboid(0, 0, 0, w, h, d)]
+        # free_splits[i] <-> self._free_bounds[i]
+        self._free_bounds = pack(self.free_splits)
+        self._free_rows = None
         self.splits = []
-        self.height_map = np.zeros((d, w), dtype=int)
+        self.used_volume = 0
+        # self.splits as rows, in a buffer grown by doubling
+        self._split_bounds = np.empty((16, 6), dtype=np.int64)
+        # heights are at most size[1], so int16 is plenty
+        self.height_map = np.zeros((d, w), dtype=np.int16)
+        
+    @property
+    def free_bounds(self):
+        # free_splits as packed (n, 6) rows, see geometry.pack; read only
+        return self._free_bounds
+    
+    @property
+    def split_bounds(self):
+        # splits as packed (n, 6) rows, see geometry.pack; read only
+        return self._split_bounds[:len(self.splits)]
+    
+    @property
+    def free_rows(self):
+        # free_splits as (left, bottom, back, right, top, front) tuples of ints,
+        # built once per change for Python-level scans
+        if self._free_rows is None:
+            self._free_rows = list(map(tuple, self._free_bounds.tolist()))
+        return self._free_rows
+    
+    def remove_free_split(self, split):
+        i = self.free_splits.index(split)
+        del self.free_splits[i]
+        self._free_bounds = np.delete(self._free_bounds, i, axis=0)
+        self._free_rows = None
         
     def fit(self, cuboid):
         outer = Cuboid(0, 0, 0, *self.size)
@@ -81,81 +223,70 @@ class SpacePartitioner:
         if not outer.contain(cuboid):
             return False
         
+        target = pack([cuboid])[0]
+        
         # print(len(self.splits), len(self.free_splits))
         if len(self.splits) < len(self.free_splits):
-            for split in self.splits:
-                if split.intersect(cuboid):
-                    return False
-            return True
+            return not intersect_batch(self._split_bounds[:len(self.splits)], target).any()
         
-        for split in self.free_splits:
-            if split.contain(cuboid):
-                return True
-        return False
+        return _contains_any(self._free_bounds, target)
     
     def add(self, cuboid):
         if not self.fit(cuboid):
             return False
             
+        target = pack([cuboid])[0]
+        n = len(self.splits)
+        if n == len(self._split_bounds):
+            self._split_bounds = np.concatenate((self._split_bounds, np.empty_like(self._split_bounds)))
+        self._split_bounds[n] = target
         self.splits.append(cuboid)
+        self.used_volume += cuboid.volume
         
         (left, bottom, back), (right, top, front) = cuboid.bounding_box()
-        cover = np.maximum(self.height_map[back:front, left:right], top)
-        self.height_map[back:front, left:right] = cover
-        
-        partitions = []
-        new_partitions = []
-        for partition in self.free_splits:
-            if partition.intersect(cuboid):
-                new_partitions.extend(partition.split(cuboid))
-            else:
-                partitions.append(partition)
+        cover = self.height_map[back:front, left:right]
+        np.maximum(cover, top, out=cover)
+        
+        hit = intersect_batch(self._free_bounds, target)
+        
+        partitions = [partition for partition, h in zip(self.free_splits, hit) if not h]
+        partition_bounds = self._free_bounds[~hit]
+        new_bounds = _split(self._free_bounds[hit], target)
                 
-        n_partitions = len(partitions)
         # only overlapped partitions create smaller partitions
         # no need to check new_partition.contain(non_overlapped)
-        for i in range(len(new_partitions)):
-            contained = False
-            
-            partition = new_partitions[i]
-            
-            # possible to have contained partitions in new partitions
-            for j in range(len(new_partitions)):
-                # impossible to have two identical partitions
-                # no need to check both a.contain(b) and b.contain(a)
-                if i != j and new_partitions[j].contain(partition):
-                    contained = True
-                    break
-                    
-            if not contained:
-                for j in range(n_partitions):
-                    if partitions[j].contain(partition):
-                        contained = True
-                        break
-            
-            # preserve order
-            if not contained:
-                partitions.append(partition)
-                
-        self.free_splits = partitions
+        # possible to have contained partitions in new partitions;
+        # impossible to have two identical ones, so a.contain(b) suffices
+        contained = _contained(new_bounds, partition_bounds)
+        
+        # preserve order
+        kept = new_bounds[~contained]
+        self.free_splits = partitions + [unpack(row) for row in kept.tolist()]
+        self._free_bounds = np.concatenate((partition_bounds, kept))
+        self._free_rows = None
         
         return True
     
-    def space_utilization(self):
-        used = np.sum([split.volume for split in self.splits])
-        
+    def space_utilization(self, check=False):
+        # added cuboids never overlap (fit() rejects them), so their volumes
+        # sum to the used space exactly
+        if check:
+            self._check_volume()
+        return self.used_volume / np.prod(self.size)
+    
+    def _check_volume(self):
+        # free splits overlap, so cut each one by the ones before it and
+        # make sure used + free still covers the whole bin
         free = []
         for free_split in self.free_splits:
             new_splits = [free_split]
             for added in free:
                 new_splits = [split for new_split in new_splits for split in new_split.split(added, False)]
             free.extend(new_splits)
-        free = np.sum([split.volume for split in free])
-        if used + free != np.prod(self.size):
+        free = sum(split.volume for split in free)
+        if self.used_volume + free != np.prod(self.size):
             raise Exception('wtf')
         
-        return used / np.prod(self.size)
-        
     def render(self, free=False):
         if free:
             splits = self.free_splits
@@ -7,7 +7,8 @@ from tensorflow.keras.regularizers import l2
 from tensorflow.keras.initializers import orthogonal
 
 from env import *
-import collections, itertools
+from heuristics import bottom_left, best_short_side_fit, best_area_fit, best_long_side_fit
+import itertools
 
 def q_net(k=1):
     weight_decay = 0.0005
@@ -43,14 +44,59 @@ def q_net(k=1):
     
     x = Dense(100, activation='relu', kernel_regularizer=l2(weight_decay), kernel_initializer='he_uniform')(x)
     
-    x = Dense(1, activation='linear')(x)
+    # float32 output even under a mixed precision policy
+    x = Dense(1, activation='linear', dtype='float32')(x)
     
     outputs = x
     model = Model([const_in, hmap_in, amap_in, imap_in], outputs)
     return model
 
+class ReplayMemory:
+    # ring buffer of transitions, one preallocated array per field;
+    # (state, action) is kept as its q_net inputs, next_state as is for the target Q
+    def __init__(self, capacity, map_shape, k):
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0
+        
+        # const_in is all ones and hmap_in is constant per map, so neither is stored
+        self.hmap = np.empty(capacity, dtype=np.float32)
+        self.amap = np.empty((capacity, *map_shape), dtype=np.float16)
+        self.imap = np.empty((capacity, k, 3), dtype=np.float16)
+        self.next_state = np.empty(capacity, dtype=object)
+        self.reward = np.empty(capacity, dtype=np.float32)
+        self.done = np.empty(capacity, dtype=bool)
+        
+    def __len__(self):
+        return self.size
+    
+    def extend(self, q_inputs, next_states, rewards, dones):
+        const_in, hmap_in, amap_in, imap_in = q_inputs
+        i = (self.head + np.arange(len(rewards))) % self.capacity
+        
+        self.hmap[i] = hmap_in[:, 0, 0, 0]
+        self.amap[i] = amap_in[..., 0]
+        self.imap[i] = imap_in
+        for j, next_state in zip(i, next_states):
+            self.next_state[j] = next_state
+        self.reward[i] = rewards
+        self.done[i] = dones
+        
+        self.head = (self.head + len(i)) % self.capacity
+        self.size = min(self.size + len(i), self.capacity)
+        
+    def sample(self, n):
+        i = np.random.randint(0, self.size, n)
+        
+        amap_in = self.amap[i, ..., None].astype(np.float32)
+        hmap_in = np.broadcast_to(self.hmap[i, None, None, None], amap_in.shape)
+        const_in = np.ones(amap_in.shape, dtype=np.float32)
+        imap_in = self.imap[i].astype(np.float32)
+        
+        return [const_in, hmap_in, amap_in, imap_in], self.next_state[i], self.reward[i], self.done[i]
+
 class Agent:
-    def __init__(self, env=MultiBinPackerEnv(n_bins=2, max_bins=-1, size=(32, 32, 32), k=10, verbose=True), train=True, verbose=True, visualize=False, batch_size=32):
+    def __init__(self, env=MultiBinPackerEnv(n_bins=2, max_bins=-1, size=(32, 32, 32), k=10, verbose=True), train=True, verbose=True, visualize=False, batch_size=32, mixed_precision=None):
         self.env = env
         
         self.gamma = 0.95
@@ -72,19 +118,38 @@ class Agent:
         self.batch_size = batch_size
         
         self.__train = train
+        
+        # compiled q_net forward passes keyed by (batch size, k),
+        # dropped if q_net is replaced (e.g. by load_model)
+        self._q_predict = {}
+        self._q_predict_model = None
 
         self.verbose = verbose
         self.visualize = visualize
         
         if self.__train:
+            # float16 compute by default on GPU; the policy only applies while building the nets
+            if mixed_precision is None:
+                mixed_precision = len(tf.config.list_physical_devices('GPU')) > 0
+            self.mixed_precision = mixed_precision
+            
+            policy = tf.keras.mixed_precision.global_policy()
+            if self.mixed_precision:
+                tf.keras.mixed_precision.set_global_policy('mixed_float16')
             self.q_net = q_net(k=env.k - 1)
             self.q_net_target = q_net(k=env.k - 1)
+            tf.keras.mixed_precision.set_global_policy(policy)
+            
             self.q_optimizer = tf.keras.optimizers.Adam(learning_rate=self.warmup_lr)
-            self.memory = collections.deque(maxlen=1000000)
+            if self.mixed_precision:
+                self.q_optimizer = tf.keras.mixed_precision.LossScaleOptimizer(self.q_optimizer)
+            W, H, D = env.size
+            self.memory = ReplayMemory(1000000, (W, D), env.k - 1)
         else:
             self.q_net = None
             self.q_net_target = None
             self.q_optimizer = None
+            self.mixed_precision = False
             self.memory = None
     
     def select(self, state):
@@ -98,14 +163,13 @@ class Agent:
             action = action_space[np.random.choice(len(action_space))]
         else:
             q = self.Q(state)
-            action = action_space[np.argmax(q)]
-            r = np.max(q)
+            best = np.argmax(q)
+            action = action_space[best]
+            r = q.flat[best]
             
         return action, r
     
     def Q_inputs(self, state, action=None):
-        W, H, D = self.env.size
-        
         items, h_maps, actions = state
         if action is None:
             action_space = indices(actions)
@@ -113,47 +177,86 @@ class Agent:
             i, j, k = action
             action_space = [(i, j, k)]
             
-        imaps = [self.env.i_map(i, items) for i in range(len(self.env.packers))]
-            
-        hmap_in = []
-        amap_in = []
-        imap_in = []
-        
         # item, bin, rotation_placement
-        for i, j, k in action_space:
-            _, (x, y, z), (w, h, d), _ = actions[i][j][k]
-            amap = self.env.p_map(j, (x, y, z, w, h, d))
-            amap = np.where(amap == 0, h_maps[j], y + h) / H
-
-            hmap = np.full(h_maps[j].shape, np.amax(amap))
-
-            imap = imaps[j][np.arange(len(items)) != i]
-#             print(hmap, amap, imap)
-
-            hmap_in.append(hmap)
-            amap_in.append(amap)
-            imap_in.append(imap)
+        placements = np.array([
+            (i, j, *actions[i][j][k][1], *actions[i][j][k][2]) 
+            for i, j, k in action_space
+        ], dtype=np.int64).reshape(-1, 8)
+        j = placements[:, 1]
+        
+        # item maps only for the bins the action space uses
+        bins, bin_index = np.unique(j, return_inverse=True)
+        imaps = np.array([self.env.i_map(b, items) for b in bins]).reshape(-1, self.env.k, 3)
+        
+        return self.placement_inputs(placements, np.take(h_maps, j, axis=0), imaps[bin_index])
+    
+    def Q_inputs_batch(self, states, actions):
+        # Q_inputs of one action per state, for many (state, action) pairs at once
+        placements = np.array([
+            (i, j, *state_actions[i][j][k][1], *state_actions[i][j][k][2]) 
+            for (_, _, state_actions), (i, j, k) in zip(states, actions)
+        ], dtype=np.int64).reshape(-1, 8)
+        h_maps = np.array([h_maps[j] for (_, h_maps, _), (i, j, k) in zip(states, actions)])
+        imaps = np.array([self.env.i_map(j, items) for (items, _, _), (i, j, k) in zip(states, actions)])
+        
+        return self.placement_inputs(placements, h_maps, imaps)
+    
+    def placement_inputs(self, placements, h_maps, imaps):
+        # placements: (n, 8) rows of (i, j, x, y, z, w, h, d)
+        # h_maps, imaps: height map and item map of bin j, per row
+        W, H, D = self.env.size
+        
+        i, j = placements[:, 0], placements[:, 1]
+        y, h = placements[:, 3], placements[:, 6]
+        
+        amap = self.env.p_map_batch(j, placements[:, 2:])
+        # built as float32, which is what q_net takes, so Q_from_inputs needs no converting copy
+        amap = np.where(amap == 0, h_maps, (y + h)[:, None, None]).astype(np.float32)
+        amap /= H
+        
+        hmap = np.broadcast_to(amap.reshape(len(amap), -1).max(axis=1)[:, None, None], amap.shape)
+        
+        # imaps without row i: shift the indices at or past i by one
+        others = np.arange(imaps.shape[1] - 1)[None, :]
+        others = others + (others >= i[:, None])
+        imap_in = imaps[np.arange(len(imaps))[:, None], others].astype(np.float32)
             
-        hmap_in, amap_in, imap_in = map(np.asarray, (hmap_in, amap_in, imap_in))
-        hmap_in = hmap_in[..., None]
-        amap_in = amap_in[..., None]
-        const_in = np.ones(hmap_in.shape)
+        hmap_in = hmap[..., None]
+        amap_in = amap[..., None]
+        const_in = np.ones(hmap_in.shape, dtype=np.float32)
         
         return [const_in, hmap_in, amap_in, imap_in]
     
+    def q_predict(self, batch_size, k):
+        if self._q_predict_model is not self.q_net:
+            self._q_predict = {}
+            self._q_predict_model = self.q_net
+            
+        key = (batch_size, k)
+        if key not in self._q_predict:
+            const_in, hmap_in, amap_in, imap_in = self.q_net.inputs
+            signature = [tf.TensorSpec((batch_size, *x.shape[1:]), tf.float32) for x in (const_in, hmap_in, amap_in)]
+            signature.append(tf.TensorSpec((batch_size, k, 3), tf.float32))
+            self._q_predict[key] = tf.function(self.q_net, jit_compile=True).get_concrete_function(signature)
+        return self._q_predict[key]
+    
     def Q(self, state, action=None):
-        const_in, hmap_in, amap_in, imap_in = self.Q_inputs(state, action)
+        return self.Q_from_inputs(self.Q_inputs(state, action))
+    
+    def Q_from_inputs(self, inputs):
+        inputs = tuple(np.asarray(x, dtype=np.float32) for x in inputs)
         
         batch_size = self.batch_size
-        sections = np.cumsum([self.batch_size] * int(np.ceil(const_in.shape[0] / batch_size) - 1))
-        batches = map(lambda data: map(lambda x: x.copy(), np.split(data, sections, axis=0)), (const_in, hmap_in, amap_in, imap_in))
+        batches = tf.data.Dataset.from_tensor_slices(inputs).batch(batch_size).prefetch(tf.data.AUTOTUNE)
+        q_predict = self.q_predict(batch_size, inputs[3].shape[1])
         
         outputs = []
-        for const_in, hmap_in, amap_in, imap_in in zip(*batches):
-            # print(const_in.shape)
-            q = self.q_net([const_in, hmap_in, amap_in, imap_in])
-#             print('const_in.shape')
-            outputs.append(q)
+        for batch in batches:
+            n = batch[0].shape[0]
+            if n < batch_size:
+                # pad the last batch so XLA compiles a single shape
+                batch = [tf.pad(x, [[0, batch_size - n]] + [[0, 0]] * (len(x.shape) - 1)) for x in batch]
+            outputs.append(q_predict(list(batch))[:n].numpy())
         q = np.concatenate(outputs, axis=0)
 #         print(q.shape)
         return q
@@ -165,48 +268,49 @@ class Agent:
             lr = self.learning_rate * (0.5 ** (epoch / self.lr_drop))
         return max(self.lr_min, lr)
             
-    def train(self, history):
-        q_inputs = []
-        q_targets = []
-        
-        for state, action, next_state, reward, done in history:
-            const_in, hmap_in, amap_in, imap_in = self.Q_inputs(state, action)
-            q_inputs.append([const_in[0], hmap_in[0], amap_in[0], imap_in[0]])
-            if done:
-                q_target = reward
-            else:
-#                 print(np.amax(self.Q(next_state)))
-                q_target = reward + self.gamma * np.amax(self.Q(next_state))
-#                 print(q_target)
-            q_targets.append([q_target])
+    def train(self, batch):
+        q_inputs, next_states, rewards, dones = batch
+        
+        # one Q pass over the action spaces of every non-terminal next state
+        next_inputs = [self.Q_inputs(next_state) for next_state, done in zip(next_states, dones) if not done]
+        q_next = np.zeros(len(rewards))
+        if next_inputs:
+            sizes = [len(inputs[0]) for inputs in next_inputs]
+            q = self.Q_from_inputs([np.concatenate(inputs) for inputs in zip(*next_inputs)])
+            q_next[~dones] = np.maximum.reduceat(q[:, 0], np.cumsum([0] + sizes[:-1]))
             
-        const_in, hmap_in, amap_in, imap_in = zip(*q_inputs)
-        q_inputs = [np.asarray(const_in), np.asarray(hmap_in), np.asarray(amap_in), np.asarray(imap_in)]
-        q_targets = np.asarray(q_targets)
+        q_targets = (np.asarray(rewards) + self.gamma * q_next)[:, None]
 #         print('q_targets', q_targets)
 #         print([result for result in map(lambda inps: (inps.shape, np.amin(inps), np.amax(inps), np.mean(inps)), q_inputs)], q_targets)
         return self.fit(q_inputs, q_targets)
     
-    def fit(self, q_inputs, q_targets):
+    @tf.function(jit_compile=True)
+    def train_step(self, q_inputs, q_targets):
         with tf.GradientTape() as tape:
-#             print(q_inputs)
             q = self.q_net_target(q_inputs)
-            # print(tf.keras.losses.MeanSquaredError()(q_targets, q))
-            loss = tf.reduce_mean(tf.square(q_targets - q))
-            loss = tf.keras.losses.MeanSquaredError()(q_targets, q)
-#             print('q', q)
-#             print('loss', loss)
+            loss = tf.reduce_mean(tf.square(q_targets - tf.cast(q, tf.float32)))
+            if self.mixed_precision:
+                scaled_loss = self.q_optimizer.get_scaled_loss(loss)
             
-#         print(list(zip(q, q_targets)))
-        grad = tape.gradient(loss, self.q_net_target.trainable_variables)
+        if self.mixed_precision:
+            grad = self.q_optimizer.get_unscaled_gradients(tape.gradient(scaled_loss, self.q_net_target.trainable_variables))
+        else:
+            grad = tape.gradient(loss, self.q_net_target.trainable_variables)
         
 #         gradient clipping
 #         if self.epoch < self.warmup_epochs:
 #             grad = [tf.clip_by_value(value, -1e-5, 1e-5) for value in grad]
         
         self.q_optimizer.apply_gradients(zip(grad, self.q_net_target.trainable_variables))
+        return loss
+    
+    def fit(self, q_inputs, q_targets):
+        # fixed float32 inputs so the compiled step is traced once
+        q_inputs = [tf.convert_to_tensor(x, dtype=tf.float32) for x in q_inputs]
+        q_targets = tf.convert_to_tensor(q_targets, dtype=tf.float32)
+        loss = self.train_step(q_inputs, q_targets)
         
-        self.q_optimizer.lr.assign(self.lr_scheduler(self.epoch))
+        self.q_optimizer.learning_rate.assign(self.lr_scheduler(self.epoch))
         
         self.epoch += 1
     
@@ -261,18 +365,18 @@ class Agent:
                 
             loss = None
             if train:
-                self.memory.extend(history)
+                states, actions, next_states, rewards, dones = zip(*history)
+                self.memory.extend(self.Q_inputs_batch(states, actions), next_states, rewards, dones)
                 if len(self.memory) > 1000:
                     print('update model')
-                    history = [self.memory[i] for i in np.random.choice(len(self.memory), 128)]
-                    loss = self.train(history)
+                    loss = self.train(self.memory.sample(128))
             
             self.ep_history.append(([packer.space_utilization() for packer in self.env.used_packers], self.env.used_bins, ep_reward))
             
             yield None
             
             utils = [round(packer.space_utilization() * 100, 2) for packer in self.env.used_packers]
-            if self.verbose: print(f'Episode {ep}, util: {utils}, used bins: {self.env.used_bins}, ep_reward: {ep_reward:.2f}, memory: {len(self.memory) if self.memory is not None else None}, eps: {self.eps:.2f}, loss: {loss}, lr: {self.q_optimizer.lr.numpy() if self.q_optimizer is not None else None}')
+            if self.verbose: print(f'Episode {ep}, util: {utils}, used bins: {self.env.used_bins}, ep_reward: {ep_reward:.2f}, memory: {len(self.memory) if self.memory is not None else None}, eps: {self.eps:.2f}, loss: {loss}, lr: {self.q_optimizer.learning_rate.numpy() if self.q_optimizer is not None else None}')
 
 class HeuristicAgent:
     def __init__(self, heuristic, env=MultiBinPackerEnv(n_bins=2, max_bins=-1, size=(32, 32, 32), k=10, verbose=True), verbose=True, visualize=False):
@@ -345,55 +449,3 @@ class HeuristicAgent:
             
             utils = [round(packer.space_utilization() * 100, 2) for packer in self.env.used_packers]
             if self.verbose: print(f'Episode {ep}, util: {utils}, used bins: {self.env.used_bins}, ep_reward: {ep_reward:.2f}')
-
-def bottom_left(actions):
-    scores = []
-    for i, item in enumerate(actions):
-        for j, bin_ in enumerate(item):
-            for k, placement in enumerate(bin_):
-                item, (x, y, z), (w, h, d), _ = placement
-                y = y + h
-                x = x + w
-                z = z + d
-                scores.append(([y, x, z, i, j, k], [i, j, k]))
-        
-    indices = sorted(range(len(scores)), key=lambda i: scores[i][0])
-    return scores[indices[0]][1]
-
-def best_short_side_fit(actions):
-    scores = []
-    for i, item in enumerate(actions):
-        for j, bin_ in enumerate(item):
-            for k, placement in enumerate(bin_):
-                item, (x, y, z), (w, h, d), split = placement
-                W, H = split.width, split.height
-                scores.append(((min(W - w, H - h), i, j, k), [i, j, k]))
-        
-#     print(scores)
-    indices = sorted(range(len(scores)), key=lambda i: scores[i][0])
-    return scores[indices[0]][1]
-
-def best_area_fit(actions):
-    scores = []
-    for i, item in enumerate(actions):
-        for j, bin_ in enumerate(item):
-            for k, placement in enumerate(bin_):
-                item, (x, y, z), (w, h, d), split = placement
-                W, H = split.width, split.height
-                scores.append(((split.volume, min(W - w, H - h), i, j, k), [i, j, k]))
-        
-#     print(scores)
-    indices = sorted(range(len(scores)), key=lambda i: scores[i][0])
-    return scores[indices[0]][1]
-
-def best_long_side_fit(actions):
-    scores = []
-    for i, item in enumerate(actions):
-        for j, bin_ in enumerate(item):
-            for k, placement in enumerate(bin_):
-                item, (x, y, z), (w, h, d), split = placement
-                W, H = split.width, split.height
-                scores.append(((max(W - w, H - h), i, j, k), [i, j, k]))
-        
-    indices = sorted(range(len(scores)), key=lambda i: scores[i][0])
-    return scores[indices[0]][1]
\ No newline at end of file
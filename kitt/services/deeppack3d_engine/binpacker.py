@@ -1,46 +1,43 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 # import seaborn as sns
-import itertools
 import random
 
-from geometry import Cuboid
+from geometry import Cuboid, pack, intersect_batch
+from SpacePartitioner import _box_faces, _BOX_FACES, _color_pool
 
 class Renderer:
     def __init__(self):
         self.fig = plt.figure()
         self.ax = self.fig.add_subplot(projection='3d')
         plt.close()
+        # filled boxes go into a single Poly3DCollection, built by show()
+        self._faces = []
+        self._face_colors = []
+        self._poly = None
+        # fill colors for draw(color=None), drawn from a batch at a time
+        self._rng = np.random.default_rng()
+        self._color_pool = []
         
     def clear(self):
         self.ax.clear()
+        self._faces = []
+        self._face_colors = []
+        self._poly = None
         
     def draw(self, box, color=None, mode='fill'):
         if color is None:
-            color = (*np.random.random((3,)) * 0.7 + 0.3, 0.6)
+            if not self._color_pool:
+                self._color_pool = _color_pool(self._rng)
+            color = self._color_pool.pop()
             
         ax = self.ax
         x, y, z = box.left, box.back, box.bottom
         dx, dy, dz = box.width, box.depth, box.height
         if mode == 'fill':
-            xx = np.linspace(x, x + dx, 2)
-            yy = np.linspace(y, y + dy, 2)
-            zz = np.linspace(z, z + dz, 2)
-
-            xx, yy = np.meshgrid(xx, yy)
-
-            l1, l2 = xx.shape
-            z0 = np.ones([l1, l2]) * z
-            ax.plot_surface(xx, yy, z0, color=color)
-            ax.plot_surface(xx, yy, z0 + dz, color=color)
-
-            yy, zz = np.meshgrid(yy, zz)
-            ax.plot_surface(x, yy, zz, color=color)
-            ax.plot_surface(x + dx, yy, zz, color=color)
-
-            xx, zz = np.meshgrid(xx, zz)
-            ax.plot_surface(xx, y, zz, color=color)
-            ax.plot_surface(xx, y + dy, zz, color=color)
+            self._faces.append(_box_faces(box))
+            self._face_colors.extend([color] * len(_BOX_FACES))
         elif mode == 'stroke':
             xx = [x, x, x + dx, x + dx, x]
             yy = [y, y + dy, y + dy, y, y]
@@ -54,7 +51,17 @@ class Renderer:
             
         return color
     
+    def _flush(self):
+        if not self._faces:
+            return
+        if self._poly is not None:
+            self._poly.remove()
+        # shaded like plot_surface
+        self._poly = Poly3DCollection(np.concatenate(self._faces), facecolors=self._face_colors, shade=True)
+        self.ax.add_collection3d(self._poly)
+        
     def show(self):
+        self._flush()
         display(self.fig)
         
 def render(size, spaces):
@@ -83,24 +90,30 @@ class BinPacker:
         w, h, d = self.size
         self.free_splits = [Cuboid(0, 0, 0, w, h, d)]
         self.splits = []
-        self.height_map = np.zeros((d, w), int)
+        self.used_volume = 0
+        # self.splits as rows, in a buffer grown by doubling
+        self._split_bounds = np.empty((16, 6), dtype=np.int64)
+        # heights are at most size[1], so int16 is plenty
+        self.height_map = np.zeros((d, w), np.int16)
         
     def fit(self, cuboid):
         outer = Cuboid(0, 0, 0, *self.size)
         if not outer.contain(cuboid):
             return False
         
-        for split in self.splits:
-            if split.intersect(cuboid):
-                return False
-        
-        return True
+        target = pack([cuboid])[0]
+        return not intersect_batch(self._split_bounds[:len(self.splits)], target).any()
     
     def add(self, cuboid):
         if not self.fit(cuboid):
             return False
             
+        n = len(self.splits)
+        if n == len(self._split_bounds):
+            self._split_bounds = np.concatenate((self._split_bounds, np.empty_like(self._split_bounds)))
+        self._split_bounds[n] = pack([cuboid])[0]
         self.splits.append(cuboid)
+        self.used_volume += cuboid.volume
         
         (left, bottom, back), (right, top, front) = cuboid.bounding_box()
         cover = np.maximum(self.height_map[back:front, left:right], top)
@@ -108,32 +121,38 @@ class BinPacker:
         
         free_splits = [split for free_split in self.free_splits for split in free_split.split(cuboid)]
         
-        removed = []
-        for a, b in itertools.combinations(free_splits, 2):
-            if a.contain(b):
-                removed.append(b)
-            elif b.contain(a):
-                removed.append(a)
+        # contains[a, b]: split a contains split b
+        bounds = pack(free_splits)
+        contains = (np.all(bounds[:, None, :3] <= bounds[None, :, :3], axis=2) & 
+                    np.all(bounds[:, None, 3:] >= bounds[None, :, 3:], axis=2))
+        # same as checking every pair a < b in order: b goes if a contains it,
+        # otherwise a goes if b contains it (so of two equal splits the first stays)
+        removed = np.triu(contains, 1).any(axis=0) | np.tril(contains & ~contains.T, -1).any(axis=0)
                 
-        self.free_splits = [split for split in free_splits if split not in removed]
+        self.free_splits = [split for split, r in zip(free_splits, removed) if not r]
         
         return True
     
-    def space_utilization(self):
-        used = np.sum([split.volume for split in self.splits])
-        
+    def space_utilization(self, check=False):
+        # added cuboids never overlap (fit() rejects them), so their volumes
+        # sum to the used space exactly
+        if check:
+            self._check_volume()
+        return self.used_volume / np.prod(self.size)
+    
+    def _check_volume(self):
+        # free splits overlap, so cut each one by the ones before it and
+        # make sure used + free still covers the whole bin
         free = []
         for free_split in self.free_splits:
             new_splits = [free_split]
             for added in free:
                 new_splits = [split for new_split in new_splits for split in new_split.split(added, False)]
             free.extend(new_splits)
-        free = np.sum([split.volume for split in free])
-        if used + free != np.prod(self.size):
+        free = sum(split.volume for split in free)
+        if self.used_volume + free != np.prod(self.size):
             raise Exception('wtf')
         
-        return used / np.prod(self.size)
-        
     def render(self, free=False):
         if free:
             splits = self.free_splits
@@ -81,6 +81,37 @@ class InputConveyor(ItemGenerator):
             self._item_iter = self._iter()
         return self
 
+class ListConveyor(ItemGenerator):
+    # items handed over in memory as (w, h, d) int triples
+    def __init__(self, k=1, items=()):
+        super().__init__(k)
+
+        self.items = items
+        
+        self._items = None
+        self._item_iter = None
+
+        self.loaded = False
+        
+    def _iter(self):
+        for w, h, d in self.items:
+            yield w, h, d
+        
+    def reset(self):
+        if not self.loaded:
+            self.loaded = True
+            self.buffer = []
+            self._items = []
+            self._item_iter = self._iter()
+        return self
+
+def _sizes(splits):
+    # sizes of splits as the rows of one read-only (n, 3) array; items are
+    # handed out as views of its rows
+    sizes = np.array([split.size for split in splits]).reshape(-1, 3)
+    sizes.flags.writeable = False
+    return sizes
+
 class Conveyor(ItemGenerator):
     def __init__(self, k=1, prealloc_bins=0, prealloc_items=0, max_items=None, max_spaces=None, size=(32, 32, 32), lb=(6, 6, 6), ub=(12, 12, 12), p=0.0, p_decay=1.0, shuffle=False, assigned_items=None):
         super().__init__(k)
@@ -97,6 +128,7 @@ class Conveyor(ItemGenerator):
         self.prealloc_bins = prealloc_bins
         self.prealloc_items = prealloc_items
         self.buffer = None
+        self._sizes = None
         
         self.assigned_items = assigned_items
         
@@ -111,11 +143,11 @@ class Conveyor(ItemGenerator):
         n_items = 0
         n_spaces = 0
         
-        for split in self.buffer:
+        for size in self._sizes:
             n_items += 1
             if self.max_items is not None and n_items > self.max_items:
                 return
-            yield np.asarray(split.size)
+            yield size
         n_spaces += self.prealloc_bins
         
         while True:
@@ -123,19 +155,17 @@ class Conveyor(ItemGenerator):
             if self.max_spaces is not None and n_spaces > self.max_spaces:
                 return
                 
-            splits = self.split_generator()
-            for split in splits:
+            for size in _sizes(self.split_generator()):
                 n_items += 1
                 if self.max_items is not None and n_items > self.max_items:
                     return
-                yield np.asarray(split.size)
+                yield size
 
     def dump(self, n_items, path):
         self.reset()
-        file = open(path, 'w')
-        for _ in range(n_items):
-            print(' '.join(map(str, self.grab())), file=file)
-        file.close()
+        lines = [' '.join(map(str, self.grab())) + '\n' for _ in range(n_items)]
+        with open(path, 'w') as file:
+            file.write(''.join(lines))
         
     def reset(self):
         self.buffer = [] # consistent rng
@@ -144,27 +174,38 @@ class Conveyor(ItemGenerator):
         
         while len(self.buffer) < self.prealloc_items:
             self.buffer.extend(self.split_generator())
+        self._sizes = _sizes(self.buffer)
             
         self._items = []
         self._item_iter = self._iter()
         return self
     
+# rotate -> index triples into (w, h, d), in the order the axis swaps
+# generate them (duplicates included)
+_rotations = {}
+
+def _rotation_indices(rotate):
+    if rotate not in _rotations:
+        sizes = [(0, 1, 2)]
+        if 'x' in rotate:
+            sizes.extend((w, d, h) for w, h, d in sizes[:])
+        if 'y' in rotate:
+            sizes.extend((d, h, w) for w, h, d in sizes[:])
+        if 'z' in rotate:
+            sizes.extend((h, w, d) for w, h, d in sizes[:])
+        _rotations[rotate] = sizes
+    return _rotations[rotate]
+    
 def rotated_sizes(item, rotate=True, remove_duplicate=True):
     if rotate is True:
         rotate = 'xyz'
     elif rotate is False:
         rotate = ''
     
-    w, h, d = item
-    sizes = [(w, h, d)]
-    if 'x' in rotate:
-        sizes.extend((w, d, h) for w, h, d in sizes[:])
-    if 'y' in rotate:
-        sizes.extend((d, h, w) for w, h, d in sizes[:])
-    if 'z' in rotate:
-        sizes.extend((h, w, d) for w, h, d in sizes[:])
+    item = tuple(item)
+    sizes = [(item[a], item[b], item[c]) for a, b, c in _rotation_indices(rotate)]
             
     if remove_duplicate:
         sizes = list(set(sizes))
         
-    return sizes
\ No newline at end of file
+    return sizes
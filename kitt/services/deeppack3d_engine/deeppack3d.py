@@ -67,7 +67,7 @@ heuristics = {
     'blsf': best_long_side_fit,
 }
 
-def deeppack3d(method, lookahead, *, n_iterations=100, seed=None, verbose=1, data='generated', path=None, train=False, visualize=False, batch_size=32):
+def deeppack3d(method, lookahead, *, n_iterations=100, seed=None, verbose=1, data='generated', path=None, items=None, train=False, visualize=False, batch_size=32):
     global Agent  # Declare Agent as global at function start
     reset_rng(seed)
     
@@ -82,6 +82,8 @@ def deeppack3d(method, lookahead, *, n_iterations=100, seed=None, verbose=1, dat
         env.conveyor = FileConveyor(k=env.k, path=path).reset()
     elif data == 'input':
         env.conveyor = InputConveyor(k=env.k).reset()
+    elif data == 'list':
+        env.conveyor = ListConveyor(k=env.k, items=items).reset()
 
     if visualize:
         if os.path.exists('./outputs'):
@@ -150,7 +152,7 @@ def deeppack3d(method, lookahead, *, n_iterations=100, seed=None, verbose=1, dat
         try:
             yield from agent.run(n_iterations, verbose=verbose > 1)
         except Exception as e:
-            if np.all(np.array(env.conveyor.reset().peek()) == None):
+            if all(item is None for item in env.conveyor.reset().peek()):
                 if verbose > 0:
                     print('\n=====the end of conveyor line=====')
             else:
@@ -158,7 +160,7 @@ def deeppack3d(method, lookahead, *, n_iterations=100, seed=None, verbose=1, dat
 
         if verbose > 0:
             print()
-            next_items = np.array(env.conveyor.reset().peek()).tolist()
+            next_items = [None if item is None else np.asarray(item).tolist() for item in env.conveyor.reset().peek()]
             avg_util = np.mean([util for utils, n_bins, ep_reward in agent.ep_history[:] for util in utils[:]])
             used_items = np.sum([n_bins for utils, n_bins, ep_reward in agent.ep_history[:] for util in utils[:]])
             
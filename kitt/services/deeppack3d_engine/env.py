@@ -1,9 +1,80 @@
+import heapq
 import numpy as np
 from conveyor import *
 from SpacePartitioner import *
 from geometry import *
 from binpacker import *
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _max_count(tile):
+        # max of tile and how often it occurs, in a single pass
+        m = tile[0, 0]
+        count = 0
+        for i in range(tile.shape[0]):
+            for j in range(tile.shape[1]):
+                v = tile[i, j]
+                if v > m:
+                    m = v
+                    count = 1
+                elif v == m:
+                    count += 1
+        return m, count
+    
+    @njit(cache=True)
+    def _placement_scan(h_map, xs, zs, ws, ds):
+        ys = np.zeros(len(xs), dtype=h_map.dtype)
+        ok = np.zeros(len(xs), dtype=np.bool_)
+        for n in range(len(xs)):
+            x, z, w, d = xs[n], zs[n], ws[n], ds[n]
+            ys[n], count = _max_count(h_map[z:z + d, x:x + w])
+            # count / (d * w) > 0.5 without the division
+            ok[n] = 2 * count > d * w
+        return ys, ok
+    
+    @njit(cache=True)
+    def _sum_max(h_map):
+        # sum and max of h_map in a single pass
+        s = 0
+        m = h_map[0, 0]
+        for i in range(h_map.shape[0]):
+            for j in range(h_map.shape[1]):
+                v = h_map[i, j]
+                s += v
+                if v > m:
+                    m = v
+        return s, m
+    
+    def _placements(h_map, xs, zs, ws, ds):
+        # resting height of the ws[n] x ds[n] footprint at each (xs[n], zs[n]),
+        # and whether more than half of the footprint is at that height
+        # (stability constraint)
+        ys, ok = _placement_scan(h_map, xs, zs, ws, ds)
+        return ys.tolist(), ok.tolist()
+else:
+    def _sum_max(h_map):
+        return np.sum(h_map), np.amax(h_map)
+    
+    def _placements(h_map, xs, zs, ws, ds):
+        if len(xs) == 0:
+            return [], []
+        # every footprint as a tile of the largest one, with the cells
+        # outside the footprint set below any height
+        W, D = ws.max(), ds.max()
+        padded = np.full((h_map.shape[0] + D, h_map.shape[1] + W), -1, dtype=h_map.dtype)
+        padded[:h_map.shape[0], :h_map.shape[1]] = h_map
+        tiles = np.lib.stride_tricks.sliding_window_view(padded, (D, W))[zs, xs]
+        inside = (np.arange(D)[:, None] < ds[:, None, None]) & (np.arange(W) < ws[:, None, None])
+        tiles = np.where(inside, tiles, -1)
+        ys = tiles.max(axis=(1, 2))
+        ok = 2 * np.count_nonzero(tiles == ys[:, None, None], axis=(1, 2)) > ds * ws
+        return ys.tolist(), ok.tolist()
+
 class Env:
     def __init__(self, verbose):
         self.verbose = verbose
@@ -29,6 +100,10 @@ def indices(actions):
         for k in range(len(actions[i][j]))
     ]
 
+def has_actions(actions):
+    # same as len(indices(actions)) > 0, without building the index list
+    return any(item_actions for bin_actions in actions for item_actions in bin_actions)
+
 class MultiBinPackerEnv(Env):
     def __init__(self, n_bins, size, k=1, max_bins=None, max_items=None, replace='all', verbose=False, prealloc_bins=0, prealloc_items=0, shuffle=False, use_rotate=True, use_skip=True):
         super().__init__(verbose)
@@ -76,29 +151,40 @@ class MultiBinPackerEnv(Env):
         return self._state
     
     def _height_maps(self):
-        return [packer.height_map.copy() for packer in self.packers]
+        # read-only views; state() stacks them into a new array anyway
+        h_maps = [packer.height_map.view() for packer in self.packers]
+        for h_map in h_maps:
+            h_map.flags.writeable = False
+        return h_maps
     
-    def placeable_coords(self, packer, h_map, size):
-        xz = []
-        splits = {}
-        for split in packer.free_splits:
-            if (split.top < self.size[1]) or (not split.fit(size)):
-                continue
-            x, y, z = split.coord
-            xz.append((x, z))
-            splits[(x, z)] = split
-        xz = set(xz)
-        
-        w, h, d = size
-        xyz = []
-        for x, z in xz:
-            placement = h_map[z:z + d, x:x + w]
-            y = np.amax(placement)
-            # placement and stability constraints
-            if np.count_nonzero(placement == y) / (d * w) > 0.5:
-                xyz.append((x, y, z, splits[(x, z)]))
-        
-        return xyz
+    def placeable_coords(self, packer, h_map, sizes):
+        # (size, x, y, z, split) for every size in sizes, grouped by size
+        H = self.size[1]
+        
+        # free splits reaching the bin top, shared by all sizes
+        tall = [(row, split) for row, split in zip(packer.free_rows, packer.free_splits) if row[4] >= H]
+        
+        candidates = []
+        # x, z, w, d of each candidate, flat
+        footprints = []
+        for size in sizes:
+            w, h, d = map(int, size)
+            xz = []
+            splits = {}
+            for (left, bottom, back, right, top, front), split in tall:
+                if right - left < w or top - bottom < h or front - back < d:
+                    continue
+                xz.append((left, back))
+                splits[(left, back)] = split
+            for x, z in set(xz):
+                candidates.append((size, x, z, splits[(x, z)]))
+                footprints += (x, z, w, d)
+        
+        # placement and stability constraints, for all sizes in one call
+        xs, zs, ws, ds = np.array(footprints, dtype=np.int64).reshape(-1, 4).T
+        ys, ok = _placements(h_map, xs, zs, ws, ds)
+        
+        return [(size, x, y, z, split) for (size, x, z, split), y, valid in zip(candidates, ys, ok) if valid]
     
     def actions(self, items, h_maps, rotate, skip):
         actions = []
@@ -107,14 +193,13 @@ class MultiBinPackerEnv(Env):
             if item is None:
                 continue
             
+            sizes = rotated_sizes(item, rotate)
             bin_actions = []
             for i, packer in enumerate(self.packers):
-                item_actions = []
-#                 print(items)
-                for size in rotated_sizes(item, rotate):
-                    for x, y, z, split in self.placeable_coords(packer, h_maps[i], size):
-                        item_actions.append((i, (x, y, z), size, split))
-                bin_actions.append(item_actions)
+                bin_actions.append([
+                    (i, (x, y, z), size, split)
+                    for size, x, y, z, split in self.placeable_coords(packer, h_maps[i], sizes)
+                ])
             actions.append(bin_actions)
                 
             # always pick the first available item
@@ -149,12 +234,13 @@ class MultiBinPackerEnv(Env):
         item = items[i]
         h_map = h_maps[j]
         
-        volume = np.sum([split.volume for split in packer.splits])
-        pyramid = volume / np.sum(h_map)
-        compactness = volume / np.prod((packer.size[0], np.amax(h_map), packer.size[2]))
+        volume = packer.used_volume
+        total, top = _sum_max(h_map)
+        pyramid = volume / total
+        compactness = volume / np.prod((packer.size[0], top, packer.size[2]))
         reward = (pyramid + compactness) / 2
         
-        done = len(indices(actions)) == 0
+        done = not has_actions(actions)
         
         if done:
             if self.max_bins != -1 and self.used_bins + 1 > self.max_bins:
@@ -178,11 +264,15 @@ class MultiBinPackerEnv(Env):
                     self.used_bins += 1
                 elif self.replace == 'all':
                     added = 0
-                    while True:
-                        loc = np.argmax([packer.space_utilization() for packer in self.packers])
+                    # fullest bins first, ties in bin order, as repeated argmax would
+                    # pick them; replacements are empty, so they never come up
+                    fullest = [(-packer.space_utilization(), loc) for loc, packer in enumerate(self.packers)]
+                    heapq.heapify(fullest)
+                    while fullest:
+                        util, loc = heapq.heappop(fullest)
                         packer = self.packers[loc]
                         
-                        if packer.space_utilization() == 0:
+                        if util == 0:
                             break
                         if self.max_bins != -1 and self.used_bins + 1 > self.max_bins:
                             break
@@ -199,7 +289,7 @@ class MultiBinPackerEnv(Env):
                 
                 next_state = self.state(step=True)
                 items, h_maps, actions = next_state
-                done = len(indices(actions)) == 0
+                done = not has_actions(actions)
                 if done:
                     for i, packer in enumerate(packer for packer in self.packers if packer.space_utilization() != 0):
                         self.used_packers.append(packer)
@@ -218,15 +308,29 @@ class MultiBinPackerEnv(Env):
         x, y, z, w, h, d = cuboid
         
         W, H, D = self.packers[i_bin].size
-        mask = np.zeros((W, D))
+        mask = np.zeros((W, D), dtype=np.float32)
         mask[z:z + d, x:x + w] = h / H
         
         return mask
     
+    def p_map_batch(self, i_bins, cuboids):
+        # p_map for many placements at once: i_bins (n,), cuboids (n, 6) -> (n, W, D)
+        x, y, z, w, h, d = np.asarray(cuboids).T
+        
+        W, _, D = self.size
+        H = np.array([packer.size[1] for packer in self.packers])[i_bins]
+        rows = np.arange(W)[None, :]
+        cols = np.arange(D)[None, :]
+        # h / H over the footprint's rows, crossed with its columns into (n, W, D)
+        # once; float32 like the Q network inputs built from it
+        in_rows = ((rows >= z[:, None]) & (rows < (z + d)[:, None])) * (h / H).astype(np.float32)[:, None]
+        in_cols = (cols >= x[:, None]) & (cols < (x + w)[:, None])
+        return in_rows[:, :, None] * in_cols[:, None, :]
+    
     def i_map(self, i_bin, items):
         W, H, D = self.packers[i_bin].size
         
-        masks = np.zeros((self.k, 3))
+        masks = np.zeros((self.k, 3), dtype=np.float32)
         for i, item in enumerate(items):
             if item is None:
                 continue
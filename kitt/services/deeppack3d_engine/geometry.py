@@ -4,41 +4,24 @@ def Point3D(x, y, z):
     return np.asarray((x, y, z))
 
 class Cuboid:
+    # cuboids are never modified after construction, so the bounds and
+    # volume are computed once here instead of per access
+    __slots__ = (
+        'x', 'y', 'z', 'width', 'height', 'depth',
+        'left', 'right', 'bottom', 'top', 'back', 'front', 'volume',
+    )
+    
     def __init__(self, x, y, z, width, height, depth):
-        self.x = x
-        self.y = y
-        self.z = z
+        self.x = self.left = x
+        self.y = self.bottom = y
+        self.z = self.back = z
         self.width = width
         self.height = height
         self.depth = depth
-    
-    @property
-    def left(self):
-        return self.x
-    
-    @property
-    def right(self):
-        return self.x + self.width
-    
-    @property
-    def bottom(self):
-        return self.y
-    
-    @property
-    def top(self):
-        return self.y + self.height
-    
-    @property
-    def back(self):
-        return self.z
-    
-    @property
-    def front(self):
-        return self.z + self.depth
-        
-    @property
-    def volume(self):
-        return self.width * self.height * self.depth
+        self.right = x + width
+        self.top = y + height
+        self.front = z + depth
+        self.volume = width * height * depth
     
     @property
     def size(self):
@@ -60,9 +43,8 @@ class Cuboid:
         return f'Cuboid({self.x}, {self.y}, {self.z}, {self.width}, {self.height}, {self.depth})'
     
     def bounding_box(self):
-        min_coords = Point3D(self.left, self.bottom, self.back)
-        max_coords = Point3D(self.right, self.top, self.front)
-        return min_coords, max_coords
+        # plain tuples, callers only unpack them; use Point3D for arrays
+        return (self.left, self.bottom, self.back), (self.right, self.top, self.front)
     
     def copy(self):
         return Cuboid(*self)
@@ -70,22 +52,22 @@ class Cuboid:
     def intersect(self, other, edge=False):
         if edge:
             return (
-                (self.left <= other.right and self.right >= other.left) and
-                (self.back <= other.front and self.front >= other.back) and
-                (self.bottom <= other.top and self.top >= other.bottom)
+                (self.x <= other.right and self.right >= other.x) and
+                (self.z <= other.front and self.front >= other.z) and
+                (self.y <= other.top and self.top >= other.y)
             )
         else:
             return (
-                (self.left < other.right and self.right > other.left) and
-                (self.back < other.front and self.front > other.back) and
-                (self.bottom < other.top and self.top > other.bottom)
+                (self.x < other.right and self.right > other.x) and
+                (self.z < other.front and self.front > other.z) and
+                (self.y < other.top and self.top > other.y)
             )
         
     def contain(self, other):
         return (
-            (self.left <= other.left and self.right >= other.right) and
-            (self.back <= other.back and self.front >= other.front) and
-            (self.bottom <= other.bottom and self.top >= other.top)
+            (self.x <= other.x and self.right >= other.right) and
+            (self.z <= other.z and self.front >= other.front) and
+            (self.y <= other.y and self.top >= other.top)
         )
     
     def split(self, other, maximal=True):
@@ -135,4 +117,27 @@ class Cuboid:
             
     def fit(self, item):
         width, height, depth = item
-        return self.width >= width and self.height >= height and self.depth >= depth
\ No newline at end of file
+        return self.width >= width and self.height >= height and self.depth >= depth
+
+# Batches of cuboids are (n, 6) int rows of (left, bottom, back, right, top, front),
+# the min and max corners in (x, y, z) order. The *_batch functions test every
+# row against one packed cuboid, the same as the Cuboid method of that name.
+
+def pack(cuboids):
+    return np.array([(c.left, c.bottom, c.back, c.right, c.top, c.front) for c in cuboids], dtype=np.int64).reshape(-1, 6)
+
+def unpack(row):
+    left, bottom, back, right, top, front = row
+    return Cuboid(left, bottom, back, right - left, top - bottom, front - back)
+
+def intersect_batch(bounds, other, edge=False):
+    if edge:
+        return np.all((bounds[:, :3] <= other[3:]) & (bounds[:, 3:] >= other[:3]), axis=1)
+    return np.all((bounds[:, :3] < other[3:]) & (bounds[:, 3:] > other[:3]), axis=1)
+
+def contain_batch(bounds, other):
+    return np.all((bounds[:, :3] <= other[:3]) & (bounds[:, 3:] >= other[3:]), axis=1)
+
+def fit_batch(bounds, item):
+    # item is a (width, height, depth) size rather than a packed cuboid
+    return np.all(bounds[:, 3:] - bounds[:, :3] >= np.asarray(item), axis=1)
@@ -4,6 +4,7 @@ Extracted from agent.py to avoid tensorflow dependency
 """
 
 import itertools
+import numpy as np
 from env import MultiBinPackerEnv
 
 
@@ -79,55 +80,48 @@ class HeuristicAgent:
             if self.verbose: print(f'Episode {ep}, util: {utils}, used bins: {self.env.used_bins}, ep_reward: {ep_reward:.2f}')
 
 
-def bottom_left(actions):
-    scores = []
-    for i, item in enumerate(actions):
-        for j, bin_ in enumerate(item):
-            for k, placement in enumerate(bin_):
-                item, (x, y, z), (w, h, d), _ = placement
-                y = y + h
-                x = x + w
-                z = z + d
-                scores.append(([y, x, z, i, j, k], [i, j, k]))
+def _flatten(actions):
+    # every placement as rows, in (i, j, k) order:
+    # (i, j, k), (x, y, z), item (w, h, d), split (width, height, depth)
+    rows = [
+        (i, j, k, x, y, z, w, h, d, split.width, split.height, split.depth)
+        for i, item in enumerate(actions)
+        for j, bin_ in enumerate(item)
+        for k, (_, (x, y, z), (w, h, d), split) in enumerate(bin_)
+    ]
+    rows = np.array(rows, dtype=np.int64).reshape(-1, 12)
+    return rows[:, 0:3], rows[:, 3:6], rows[:, 6:9], rows[:, 9:12]
 
-    indices = sorted(range(len(scores)), key=lambda i: scores[i][0])
-    return scores[indices[0]][1]
 
+def _key(*columns):
+    # int columns, most significant first, packed into one int64 per row
+    # that orders like the column tuples do
+    key = np.zeros_like(columns[0])
+    for column in columns:
+        column = column - column.min()
+        key = key * (column.max() + 1) + column
+    return key
 
-def best_short_side_fit(actions):
-    scores = []
-    for i, item in enumerate(actions):
-        for j, bin_ in enumerate(item):
-            for k, placement in enumerate(bin_):
-                item, (x, y, z), (w, h, d), split = placement
-                W, H = split.width, split.height
-                scores.append(((min(W - w, H - h), i, j, k), [i, j, k]))
 
-    indices = sorted(range(len(scores)), key=lambda i: scores[i][0])
-    return scores[indices[0]][1]
+# ties go to the first placement in (i, j, k) order, which np.argmin keeps
 
+def bottom_left(actions):
+    ijk, xyz, whd, _ = _flatten(actions)
+    x, y, z = (xyz + whd).T
+    return ijk[_key(y, x, z).argmin()].tolist()
 
-def best_area_fit(actions):
-    scores = []
-    for i, item in enumerate(actions):
-        for j, bin_ in enumerate(item):
-            for k, placement in enumerate(bin_):
-                item, (x, y, z), (w, h, d), split = placement
-                W, H = split.width, split.height
-                scores.append(((split.volume, min(W - w, H - h), i, j, k), [i, j, k]))
 
-    indices = sorted(range(len(scores)), key=lambda i: scores[i][0])
-    return scores[indices[0]][1]
+def best_short_side_fit(actions):
+    ijk, _, whd, split = _flatten(actions)
+    return ijk[np.minimum(split[:, 0] - whd[:, 0], split[:, 1] - whd[:, 1]).argmin()].tolist()
+
+
+def best_area_fit(actions):
+    ijk, _, whd, split = _flatten(actions)
+    short_side = np.minimum(split[:, 0] - whd[:, 0], split[:, 1] - whd[:, 1])
+    return ijk[_key(split.prod(axis=1), short_side).argmin()].tolist()
 
 
 def best_long_side_fit(actions):
-    scores = []
-    for i, item in enumerate(actions):
-        for j, bin_ in enumerate(item):
-            for k, placement in enumerate(bin_):
-                item, (x, y, z), (w, h, d), split = placement
-                W, H = split.width, split.height
-                scores.append(((max(W - w, H - h), i, j, k), [i, j, k]))
-
-    indices = sorted(range(len(scores)), key=lambda i: scores[i][0])
-    return scores[indices[0]][1]
+    ijk, _, whd, split = _flatten(actions)
+    return ijk[np.maximum(split[:, 0] - whd[:, 0], split[:, 1] - whd[:, 1]).argmin()].tolist()
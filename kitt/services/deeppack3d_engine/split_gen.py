@@ -41,37 +41,42 @@ def _split_sort(splits):
     
 #     splits = sorted_splits
 
-    bottom = np.asarray([split.bottom for split in splits])
-    dist = np.sqrt(np.sum(np.power([split.coord for split in splits], 2), axis=-1))
-    
-    return [splits[i] for i in np.lexsort((dist, bottom))]
+    return [splits[i] for i in _split_order(pack(splits))]
+
+def _split_order(bounds):
+    # by bottom, then distance of the coord from the origin; squared distance
+    # orders the same as the distance and stays in ints
+    dist = np.sum(bounds[:, :3] ** 2, axis=1)
+    return np.lexsort((dist, bounds[:, 1]))
 
 def _gullotine_cut(space, min_size, max_size, p, p_decay):
     splits = []
-    x, y, z, width, height, depth = space
-    
-    coord = np.asarray((x, y, z))
-    size = np.asarray((width, height, depth))
-    min_size = np.asarray(min_size)
-    max_size = np.asarray(max_size)
-    
-    must_split = size > max_size
-    rand_split = (min_size * 2 <= size) & (rng.random(3) < p)
-    axes = must_split | rand_split
-    
-    if np.any(axes):
-        axis = rng.choice(np.count_nonzero(axes))
-        axis = np.argwhere(axes)[axis, 0]
+    coord = space.coord
+    size = space.size
+    
+    # plain ints per axis, numpy dispatch costs more than the work here
+    r = rng.random(3)
+    axes = [
+        axis for axis in range(3)
+        if size[axis] > max_size[axis] or (min_size[axis] * 2 <= size[axis] and r[axis] < p)
+    ]
+    
+    if axes:
+        axis = axes[rng.choice(len(axes))]
         
         low, high = min_size[axis], size[axis] - min_size[axis]
         
-        pivot = rng.choice(np.arange(low, high + 1))
+        pivot = int(rng.integers(low, high + 1))
         
-        mask = np.zeros_like(axes)
-        mask[axis] = True
+        a_size = list(size)
+        a_size[axis] = pivot
+        b_coord = list(coord)
+        b_coord[axis] += pivot
+        b_size = list(size)
+        b_size[axis] -= pivot
         
-        a = Cuboid(*coord, *np.where(mask, pivot, size))
-        b = Cuboid(*np.where(mask, coord + pivot, coord), *np.where(mask, size - pivot, size))
+        a = Cuboid(*coord, *a_size)
+        b = Cuboid(*b_coord, *b_size)
         
         splits.extend(_gullotine_cut(a, min_size, max_size, p * p_decay, p_decay))
         splits.extend(_gullotine_cut(b, min_size, max_size, p * p_decay, p_decay))
@@ -91,45 +96,46 @@ def gullotine_cut(size, min_size, max_size, p, p_decay):
 def _nongullotine_cut(size, min_size, max_size, p, p_decay, verbose=False):
     packer = SpacePartitioner(size)
     
-    min_size = np.asarray(min_size)
-    max_size = np.asarray(max_size)
+    min_size = tuple(min_size)
+    max_size = tuple(max_size)
     
     while len(packer.free_splits) > 0:
-        free_split = packer.free_splits[np.argmin(np.prod([split.size for split in packer.free_splits], axis=-1))]
+        # smallest free split by volume, first one on ties
+        bounds = packer.free_bounds
+        free_split = packer.free_splits[np.argmin(np.prod(bounds[:, 3:] - bounds[:, :3], axis=1))]
         
-        size = np.asarray(free_split.size)
-        must_split = size > max_size
-        rand_split = (min_size * 2 <= size) & (rng.random(3) < p)
-        axes = must_split | rand_split
+        # plain ints per axis, as in _gullotine_cut
+        coord, size = free_split.coord, free_split.size
+        r = rng.random(3)
+        axes = [
+            size[axis] > max_size[axis] or (min_size[axis] * 2 <= size[axis] and r[axis] < p)
+            for axis in range(3)
+        ]
+        too_small = any(size[axis] < min_size[axis] for axis in range(3))
         
-        if np.any(axes) and not np.any(size < min_size):
-            low, high = min_size[axes], np.amin((max_size, size // 2), axis=0)[axes]
-            rand_size = np.copy(low)
-            mask = low != high
-            rand_size[mask] = rng.integers(low[mask], high[mask])
+        if any(axes) and not too_small:
+            new_size = list(size)
+            for axis in range(3):
+                if axes[axis]:
+                    low, high = min_size[axis], min(max_size[axis], size[axis] // 2)
+                    new_size[axis] = low if low == high else int(rng.integers(low, high))
             
             if verbose:
-                print(size, must_split, rand_split, axes, low, high, p)
-            
-            new_size = np.copy(size)
-            new_size[axes] = rand_size
-            
-            if verbose:
-                print(new_size)
-                print(*free_split.coord, *new_size)
+                print(size, axes, new_size, p)
+                print(*coord, *new_size)
                 
-            if not packer.add(Cuboid(*free_split.coord, *new_size)):
-                raise Exception('invalid split', Cuboid(*free_split.coord, *new_size))
+            if not packer.add(Cuboid(*coord, *new_size)):
+                raise Exception('invalid split', Cuboid(*coord, *new_size))
         
             p = p * p_decay
         else:
-            if not np.any(size < min_size):
+            if not too_small:
                 if verbose:
                     print('unexpected size', size)
-                if not packer.add(Cuboid(*free_split.coord, *size)):
-                    raise Exception('invalid split', Cuboid(*free_split.coord, *new_size))
+                if not packer.add(Cuboid(*coord, *size)):
+                    raise Exception('invalid split', Cuboid(*coord, *size))
             else:
-                packer.free_splits.remove(free_split)
+                packer.remove_free_split(free_split)
 
                 if verbose:
                     print('wtf')
@@ -137,8 +143,8 @@ def _nongullotine_cut(size, min_size, max_size, p, p_decay, verbose=False):
     return packer
 
 def nongullotine_cut(size, lb, ub, p, p_decay, verbose=False, shuffle=False):
-    splits = _nongullotine_cut(size, lb, ub, p, p_decay, verbose).splits
-    splits = _split_sort(splits)
+    packer = _nongullotine_cut(size, lb, ub, p, p_decay, verbose)
+    splits = [packer.splits[i] for i in _split_order(packer.split_bounds)]
 #     print('before', splits)
     if shuffle:
         splits = np.asarray(splits)
@@ -7,9 +7,12 @@ import sys
 import os
 import time
 import logging
+from collections import defaultdict
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
+
 # Add DeepPack3D to path
 DEEPPACK_DIR = Path(__file__).parent / "deeppack3d_engine"
 sys.path.insert(0, str(DEEPPACK_DIR))
@@ -81,26 +84,29 @@ class DeepPack3DService:
 
             # Scale down container and items for DeepPack3D
             scaled_container = tuple(int(d * scale_factor) for d in container_dimensions)
-            scaled_items = [
-                {
-                    **item,
-                    "width": item["width"] * scale_factor,
-                    "height": item["height"] * scale_factor,
-                    "depth": item["depth"] * scale_factor
-                }
-                for item in items
-            ]
 
             logger.info(f"Scaling: {scale_factor:.4f}x (container {container_dimensions} → {scaled_container})")
 
-            # Convert KITT items to DeepPack3D format (already scaled)
-            deeppack_items = self._convert_items_to_deeppack_format(scaled_items)
+            # Convert KITT items to DeepPack3D format, scaled in place
+            deeppack_items = self._convert_items_to_deeppack_format(items)
+            deeppack_items *= scale_factor
+
+            # Item indices by rounded dimensions, for matching results back to items;
+            # duplicates are handed out in order, one per match
+            dim_index = defaultdict(list)
+            for idx, dims in enumerate(deeppack_items.round(2).tolist()):
+                dim_index[tuple(dims)].append(idx)
 
-            # Create temporary input file for DeepPack3D
-            input_file = self._create_input_file(deeppack_items, container_dimensions)
+            # DeepPack3D takes integer item dimensions (w, h, d) and uses a hardcoded
+            # 32×32×32 bin, so the container dimensions are not passed on
+            input_items = deeppack_items.astype(np.int64).tolist()
 
             # Run Deep Pack3D algorithm
-            placements = []
+            # Per-placement fields, in DeepPack3D's scaled units until the run ends
+            placed_items = []
+            placed_boxes = []
+            placed_rotations = []
+            placed_bins = []
             bins_used = 1  # Start with bin 1
             current_bin_weight = 0.0
             current_bin_items = []
@@ -110,8 +116,8 @@ class DeepPack3DService:
                     method=self.method,
                     lookahead=self.lookahead,
                     n_iterations=-1,  # Process all items
-                    data='file',
-                    path=str(input_file),
+                    data='list',
+                    items=input_items,
                     verbose=self.verbose
                 ):
                     if result is None:
@@ -142,15 +148,15 @@ class DeepPack3DService:
                         # Extract item index from item_cuboid
                         if hasattr(item_cuboid, 'width'):  # It's a Cuboid (the item)
                             # Find matching item by dimensions
-                            item_idx = None
-                            for idx, deeppack_item in enumerate(deeppack_items):
-                                if (abs(deeppack_item[0] - item_cuboid.width) < 0.01 and
-                                    abs(deeppack_item[1] - item_cuboid.height) < 0.01 and
-                                    abs(deeppack_item[2] - item_cuboid.depth) < 0.01):
-                                    item_idx = idx
-                                    break
-                            if item_idx is None:
-                                item_idx = len(placements)  # Fallback to placement count
+                            matches = dim_index.get((
+                                round(float(item_cuboid.width), 2),
+                                round(float(item_cuboid.height), 2),
+                                round(float(item_cuboid.depth), 2)
+                            ))
+                            if matches:
+                                item_idx = matches.pop(0)
+                            else:
+                                item_idx = len(placed_items)  # Fallback to placement count
                         else:
                             item_idx = item_cuboid
 
@@ -177,35 +183,23 @@ class DeepPack3DService:
                             current_bin_weight += item_weight
                             current_bin_items.append(item['id'])
 
-                        # Scale positions and dimensions back to original size
-                        placements.append({
-                            "item_id": item["id"],
-                            "position": {
-                                "x": float(x / scale_factor),
-                                "y": float(y / scale_factor),
-                                "z": float(z / scale_factor)
-                            },
-                            "dimensions": {
-                                "width": float(w / scale_factor),
-                                "height": float(h / scale_factor),
-                                "depth": float(d / scale_factor)
-                            },
-                            "rotation": rotation,
-                            "bin_number": bins_used,
-                            "weight": item_weight
-                        })
+                        placed_items.append(item_idx)
+                        placed_boxes.append((x, y, z, w, h, d))
+                        placed_rotations.append(rotation)
+                        placed_bins.append(bins_used)
 
             except Exception as e:
                 logger.error(f"Error during DeepPack3D execution: {e}")
                 raise
-            finally:
-                # Clean up temporary file
-                if input_file.exists():
-                    input_file.unlink()
+
+            # Scale positions and dimensions back to original size
+            boxes = np.array(placed_boxes, dtype=np.float64).reshape(-1, 6) / scale_factor
+            bin_numbers = np.array(placed_bins, dtype=np.int64)
+            placements = self._build_placements(items, placed_items, boxes, placed_rotations, bin_numbers)
 
             # Calculate metrics
             computation_time_ms = int((time.time() - start_time) * 1000)
-            utilization = self._calculate_utilization(placements, container_dimensions)
+            utilization = self._calculate_utilization(boxes[:, 3:], bin_numbers, container_dimensions)
 
             result = {
                 "success": True,
@@ -239,61 +233,55 @@ class DeepPack3DService:
                 "computation_time_ms": int((time.time() - start_time) * 1000)
             }
 
-    def _convert_items_to_deeppack_format(
+    def _build_placements(
         self,
-        items: List[Dict[str, Any]]
-    ) -> List[Tuple[float, float, float]]:
-        """Convert KITT items to DeepPack3D format (w, h, d tuples)"""
-        return [
-            (
-                float(item["width"]),
-                float(item["height"]),
-                float(item["depth"])
-            )
-            for item in items
-        ]
+        items: List[Dict[str, Any]],
+        item_indices: List[int],
+        boxes: np.ndarray,
+        rotations: List[int],
+        bin_numbers: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        """Build placement dicts from per-placement items and (n, 6) x, y, z, w, h, d boxes"""
+        placements = []
+        for idx, (x, y, z, w, h, d), rotation, bin_number in zip(
+            item_indices, boxes.tolist(), rotations, bin_numbers.tolist()
+        ):
+            item = items[idx]
+            placements.append({
+                "item_id": item["id"],
+                "position": {"x": x, "y": y, "z": z},
+                "dimensions": {"width": w, "height": h, "depth": d},
+                "rotation": rotation,
+                "bin_number": bin_number,
+                "weight": item.get("weight", 0)
+            })
+        return placements
 
-    def _create_input_file(
+    def _convert_items_to_deeppack_format(
         self,
-        items: List[Tuple[float, float, float]],
-        container_dimensions: Tuple[float, float, float]
-    ) -> Path:
-        """Create temporary input file for DeepPack3D"""
-        # DeepPack3D input format:
-        # Each line: item dimensions (w h d), one per line
-        # NOTE: DeepPack3D uses hardcoded 32×32×32 bin size
-        # Container dimensions are ignored by the algorithm
-
-        temp_dir = Path("/tmp/kitt_deeppack3d")
-        temp_dir.mkdir(exist_ok=True)
-
-        input_file = temp_dir / f"input_{int(time.time() * 1000)}.txt"
-
-        with open(input_file, 'w') as f:
-            # Write only item dimensions (no container size)
-            # Use integers to match DeepPack3D's expected format
-            for w, h, d in items:
-                f.write(f"{int(w)} {int(h)} {int(d)}\n")
-
-        return input_file
+        items: List[Dict[str, Any]]
+    ) -> np.ndarray:
+        """Convert KITT items to DeepPack3D format ((n, 3) float array of w, h, d)"""
+        return np.array(
+            [(item["width"], item["height"], item["depth"]) for item in items],
+            dtype=np.float64
+        ).reshape(-1, 3)
 
     def _calculate_utilization(
         self,
-        placements: List[Dict[str, Any]],
+        dims: np.ndarray,
+        bin_numbers: np.ndarray,
         container_dimensions: Tuple[float, float, float]
     ) -> float:
-        """Calculate space utilization percentage"""
-        if not placements:
+        """Calculate space utilization percentage from placed (n, 3) dimensions and their bins"""
+        if len(dims) == 0:
             return 0.0
 
         # Calculate total item volume
-        total_item_volume = sum(
-            p["dimensions"]["width"] * p["dimensions"]["height"] * p["dimensions"]["depth"]
-            for p in placements
-        )
+        total_item_volume = float(np.prod(dims, axis=1).sum())
 
         # Calculate container volume (considering bins used)
-        bins_used = max(p["bin_number"] for p in placements) if placements else 1
+        bins_used = int(bin_numbers.max())
         container_volume = (
             container_dimensions[0] * container_dimensions[1] * container_dimensions[2]
         ) * bins_used
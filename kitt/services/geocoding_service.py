@@ -5,8 +5,10 @@ Uses OpenWeatherMap Geocoding API (free with weather API key)
 
 import httpx
 import logging
+from collections import OrderedDict
 from typing import Dict, Optional, Tuple
 from config.settings import settings
+from services.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +18,13 @@ class GeocodingService:
 
     def __init__(self):
         self.api_key = settings.WEATHER_API_KEY
-        self.client = httpx.AsyncClient(timeout=10.0)
-        self._cache = {}  # Simple in-memory cache
+        self._cache = OrderedDict()  # In-memory LRU cache, keyed by normalized city name
+        self._cache_size = settings.GEOCODING_CACHE_SIZE
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client"""
+        return get_http_client()
 
     async def get_coordinates(self, city: str) -> Optional[Tuple[float, float]]:
         """
@@ -30,8 +37,10 @@ class GeocodingService:
             (lat, lon) tuple or None if not found
         """
         # Check cache
-        if city in self._cache:
-            return self._cache[city]
+        key = city.lower().strip()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
 
         try:
             url = "http://api.openweathermap.org/geo/1.0/direct"
@@ -49,7 +58,7 @@ class GeocodingService:
                 lat = data[0]["lat"]
                 lon = data[0]["lon"]
                 coords = (lat, lon)
-                self._cache[city] = coords
+                self._cache_put(key, coords)
                 return coords
 
             logger.warning(f"No coordinates found for city: {city}")
@@ -60,6 +69,13 @@ class GeocodingService:
             # Return approximate coordinates for major cities as fallback
             return self._get_fallback_coordinates(city)
 
+    def _cache_put(self, key: str, coords: Tuple[float, float]):
+        """Cache coordinates, evicting the least recently used entry when full"""
+        self._cache[key] = coords
+        self._cache.move_to_end(key)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
     def _get_fallback_coordinates(self, city: str) -> Optional[Tuple[float, float]]:
         """Fallback coordinates for major US cities"""
         fallback_coords = {
@@ -110,14 +126,13 @@ class GeocodingService:
         coords = fallback_coords.get(city_lower)
 
         if coords:
-            self._cache[city] = coords
+            self._cache_put(city_lower, coords)
             logger.info(f"Using fallback coordinates for {city}")
 
         return coords
 
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """No-op: the shared HTTP client is closed by close_http_client()"""
 
 
 # Singleton instance
@@ -0,0 +1,44 @@
+"""
+Shared HTTP client for external API services
+Weather, traffic and geocoding all reuse one connection pool
+"""
+
+import httpx
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Shared client instance
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get or create the shared HTTP client
+
+    Keep-alive connections are reused across services, so warm calls skip
+    the TCP/TLS handshake. The transport retries a failed connect once (two
+    attempts in all) so a flaky upstream doesn't stall route lookups.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # Limits go on the transport; the client ignores its own when given one
+        _http_client = httpx.AsyncClient(
+            timeout=10.0,
+            transport=httpx.AsyncHTTPTransport(
+                retries=1,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        )
+        logger.info("Created shared HTTP client")
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("Closed shared HTTP client")
@@ -7,6 +7,7 @@ import httpx
 import logging
 from typing import Dict, List, Optional
 from config.settings import settings
+from services.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +18,11 @@ class TrafficService:
     def __init__(self):
         self.api_key = settings.TRAFFIC_API_KEY
         self.api_url = settings.TRAFFIC_API_URL
-        self.client = httpx.AsyncClient(timeout=10.0)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client"""
+        return get_http_client()
 
     async def get_traffic_flow(
         self,
@@ -253,8 +258,7 @@ class TrafficService:
         }
 
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """No-op: the shared HTTP client is closed by close_http_client()"""
 
 
 # Singleton instance
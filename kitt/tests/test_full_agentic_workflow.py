@@ -52,14 +52,15 @@ async def test_full_agentic_optimization():
             "description": f"Box {i+1}"
         })
 
-    deadline = (datetime.now() + timedelta(days=3)).isoformat()
+    deadline_at = datetime.now() + timedelta(days=3)
+    deadline = deadline_at.isoformat()
 
     shipment_result = await tools.create_shipment(
         origin="Los Angeles",
         destination="New York",
         items=items,
         priority="high",
-        deadline=deadline
+        deadline=deadline_at
     )
 
     shipment_id = shipment_result.get("shipment_id")